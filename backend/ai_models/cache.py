@@ -0,0 +1,138 @@
+"""Exact-match response cache for AI model providers.
+
+Entries are keyed by a SHA-256 digest of the canonical request payload so that
+identical (model, messages, params) tuples can be answered without another
+provider round-trip.
+"""
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Optional, Protocol
+
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class CacheStats:
+    """Thread-safe hit/miss/error counters for one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "errors": 0}
+
+    def record(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+# Process-wide counters, surfaced via the cache stats endpoint
+STATS = CacheStats()
+
+_DEFAULT_CACHE: Optional["CacheBackend"] = None
+_DEFAULT_CACHE_LOCK = threading.Lock()
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> Optional[dict]:
+        ...
+
+    def set(self, key: str, value: dict) -> None:
+        ...
+
+    def delete(self, key: str) -> None:
+        ...
+
+
+class InMemoryLRU:
+    """Per-process LRU cache with a single time-to-live for all entries."""
+
+    def __init__(self, maxsize: int = 1024, ttl: int = 3600):
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key: str, value: dict) -> None:
+        with self._lock:
+            self._cache[key] = value
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._cache.pop(key, None)
+
+
+class RedisBackend:
+    """Shared cache stored in Redis; values are JSON encoded.
+
+    Fails open: when Redis is unreachable, reads are misses and writes are
+    dropped, so an outage costs provider calls rather than failing requests.
+    """
+
+    def __init__(self, url: str, prefix: str = "llm:", ttl: int = 3600):
+        import redis  # installed alongside channels-redis
+
+        self._client = redis.Redis.from_url(url)
+        self._errors = (redis.RedisError, ValueError)
+        self._prefix = prefix
+        self._ttl = ttl
+
+    def _failed(self, op: str, exc: Exception) -> None:
+        STATS.record("errors")
+        logger.warning("LLM cache %s failed: %s", op, exc)
+
+    def get(self, key: str) -> Optional[dict]:
+        try:
+            raw = self._client.get(self._prefix + key)
+            return json.loads(raw) if raw is not None else None
+        except self._errors as exc:
+            self._failed("get", exc)
+            return None
+
+    def set(self, key: str, value: dict) -> None:
+        try:
+            self._client.set(self._prefix + key, json.dumps(value), ex=self._ttl)
+        except self._errors as exc:
+            self._failed("set", exc)
+
+    def delete(self, key: str) -> None:
+        try:
+            self._client.delete(self._prefix + key)
+        except self._errors as exc:
+            self._failed("delete", exc)
+
+
+def make_cache_key(**parts: Any) -> str:
+    """Return a stable SHA-256 hex digest for the given request parts."""
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def get_default_cache() -> Optional[CacheBackend]:
+    """Build (once) the cache configured by settings.LLM_CACHE.
+
+    Supported values: "memory" (default), "redis", and "none" to disable.
+    """
+    global _DEFAULT_CACHE
+    if _DEFAULT_CACHE is not None:
+        return _DEFAULT_CACHE
+    from django.conf import settings
+
+    kind = (getattr(settings, "LLM_CACHE", "memory") or "none").lower()
+    if kind == "none":
+        return None
+    ttl = int(getattr(settings, "LLM_CACHE_TTL", 3600))
+    with _DEFAULT_CACHE_LOCK:
+        if _DEFAULT_CACHE is None:
+            if kind == "redis":
+                _DEFAULT_CACHE = RedisBackend(settings.LLM_CACHE_REDIS_URL, ttl=ttl)
+            else:
+                _DEFAULT_CACHE = InMemoryLRU(maxsize=int(getattr(settings, "LLM_CACHE_MAXSIZE", 1024)), ttl=ttl)
+    return _DEFAULT_CACHE
@@ -1,18 +1,101 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Iterable, Optional
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import AsyncIterator, Iterable, Iterator, Optional, Sequence
 import os
+import threading
 import typing as _t
 import httpx as _httpx
+from asgiref.sync import sync_to_async
+
+from .cache import CacheBackend, STATS, get_default_cache, make_cache_key
 try:
     import openai as _openai
 except Exception:  # pragma: no cover
     _openai = None  # type: ignore
 
+# One OpenAI client (and httpx connection pool) per API key for the whole process
+_CLIENT_LOCK = threading.Lock()
+_SHARED_CLIENTS: dict[str, _t.Any] = {}
+_SHARED_ASYNC_CLIENTS: dict[str, _t.Any] = {}
+_HTTP_LIMITS = _httpx.Limits(max_connections=1000, max_keepalive_connections=100, keepalive_expiry=30.0)
+_HTTP_TIMEOUT = _httpx.Timeout(60.0, connect=5.0)
+
+
+def _get_client(api_key: str):
+    """Return the shared v1 OpenAI client for `api_key`, creating it on first use."""
+    client = _SHARED_CLIENTS.get(api_key)
+    if client is not None:
+        return client
+    with _CLIENT_LOCK:
+        client = _SHARED_CLIENTS.get(api_key)
+        if client is None:
+            # Passing our own httpx.Client also sidesteps the httpx>=0.28
+            # 'proxies' kwarg incompatibility in older openai releases.
+            http_client = _httpx.Client(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT)
+            client = _openai.OpenAI(api_key=api_key, http_client=http_client)  # type: ignore[union-attr]
+            _SHARED_CLIENTS[api_key] = client
+    return client
+
+
+def _get_async_client(api_key: str):
+    """Return the shared AsyncOpenAI client for `api_key`, creating it on first use."""
+    client = _SHARED_ASYNC_CLIENTS.get(api_key)
+    if client is not None:
+        return client
+    with _CLIENT_LOCK:
+        client = _SHARED_ASYNC_CLIENTS.get(api_key)
+        if client is None:
+            http_client = _httpx.AsyncClient(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT)
+            client = _openai.AsyncOpenAI(api_key=api_key, http_client=http_client)  # type: ignore[union-attr]
+            _SHARED_ASYNC_CLIENTS[api_key] = client
+    return client
+
+
+_STREAM_DONE = object()
+
+
+def _cache_max_temperature() -> float:
+    from django.conf import settings
+
+    return float(getattr(settings, 'LLM_CACHE_MAX_TEMPERATURE', 0.0))
+
+
+async def _iterate_in_thread(iterator: Iterator[str]) -> AsyncIterator[str]:
+    """Drive a blocking iterator from a worker thread, yielding each item."""
+    next_item = sync_to_async(next, thread_sensitive=False)
+    while True:
+        item = await next_item(iterator, _STREAM_DONE)
+        if item is _STREAM_DONE:
+            return
+        yield item
+
 @dataclass
 class ChatMessage:
     role: str
     content: str
+    # Optional hints for payload building, e.g. {"stable": True} for static prompt prefixes
+    meta: dict = field(default_factory=dict)
+
+
+def _split_stable_dynamic(messages: Iterable[ChatMessage]) -> tuple[list[ChatMessage], list[ChatMessage]]:
+    """Partition messages into the stable prefix and the dynamic remainder.
+
+    Both groups keep their insertion order. Providers cache prompts by prefix,
+    so static content must come first for repeated requests to hit the cache.
+    """
+    stable: list[ChatMessage] = []
+    dynamic: list[ChatMessage] = []
+    for m in messages:
+        (stable if m.meta.get('stable') else dynamic).append(m)
+    return stable, dynamic
+
+
+def build_payload(messages: Iterable[ChatMessage]) -> list[dict]:
+    """Return provider messages with stable messages ordered ahead of dynamic ones."""
+    stable, dynamic = _split_stable_dynamic(messages)
+    return [{ 'role': m.role, 'content': m.content } for m in stable + dynamic]
+
 
 class AIModel(ABC):
     @abstractmethod
@@ -27,9 +110,61 @@ class AIModel(ABC):
     ) -> ChatMessage:
         ...
 
+    def chat_stream(
+        self,
+        messages: Iterable[ChatMessage],
+        *,
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        top_p: float = 1.0,
+        max_tokens: int = 512,
+    ) -> Iterator[str]:
+        """Yield the reply as text deltas; providers without streaming yield it whole."""
+        reply = self.chat(messages, model=model, temperature=temperature, top_p=top_p, max_tokens=max_tokens)
+        if reply.content:
+            yield reply.content
+
+    async def achat(
+        self,
+        messages: Iterable[ChatMessage],
+        *,
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        top_p: float = 1.0,
+        max_tokens: int = 512,
+    ) -> ChatMessage:
+        """Async variant of `chat`; the default runs it in a worker thread."""
+        return await sync_to_async(self.chat, thread_sensitive=False)(
+            messages, model=model, temperature=temperature, top_p=top_p, max_tokens=max_tokens
+        )
+
+    async def achat_stream(
+        self,
+        messages: Iterable[ChatMessage],
+        *,
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        top_p: float = 1.0,
+        max_tokens: int = 512,
+    ) -> AsyncIterator[str]:
+        """Async variant of `chat_stream`; the default runs the sync stream in a worker thread."""
+        stream = self.chat_stream(messages, model=model, temperature=temperature, top_p=top_p, max_tokens=max_tokens)
+        async for delta in _iterate_in_thread(iter(stream)):
+            yield delta
+
 class EchoModel(AIModel):
     def chat(self, messages: Iterable[ChatMessage], *, model: Optional[str] = None, temperature: float = 0.7, top_p: float = 1.0, max_tokens: int = 512) -> ChatMessage:
-        last_user = next((m for m in reversed(list(messages)) if m.role == 'user'), None)
+        last_user = None
+        if isinstance(messages, Sequence):
+            # Scan from the tail so long histories exit on the last turn
+            for i in range(len(messages) - 1, -1, -1):
+                if messages[i].role == 'user':
+                    last_user = messages[i]
+                    break
+        else:
+            for m in messages:
+                if m.role == 'user':
+                    last_user = m
         return ChatMessage(role='assistant', content=last_user.content if last_user else '(no input)')
 
 
@@ -38,9 +173,13 @@ class OpenAIModel(AIModel):
 
     Chooses implementation at runtime based on available attributes in the
     imported `openai` package. Avoids passing unsupported kwargs.
+
+    Near-deterministic requests (temperature up to LLM_CACHE_MAX_TEMPERATURE,
+    or any request with an explicit `cache_seed`) are answered from `cache`
+    when an identical history and parameters were seen before.
     """
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, cache: Optional[CacheBackend] = None):
         if _openai is None:
             raise RuntimeError('openai package not installed')
         self.api_key = api_key or os.environ.get('OPENAI_API_KEY')
@@ -51,25 +190,45 @@ class OpenAIModel(AIModel):
         self._mode = 'v1' if hasattr(_openai, 'OpenAI') else 'legacy'
         self._client = None
         if self._mode == 'v1':
-            # Use environment for key to avoid passing unexpected kwargs
-            os.environ['OPENAI_API_KEY'] = self.api_key
-            try:
-                self._client = _openai.OpenAI()  # type: ignore[attr-defined]
-            except TypeError as e:
-                # Workaround for httpx>=0.28 where 'proxies' kw was removed;
-                # construct our own httpx.Client and pass it in so OpenAI doesn't
-                # inject unsupported args.
-                if 'proxies' in str(e):
-                    self._client = _openai.OpenAI(http_client=_httpx.Client())  # type: ignore[attr-defined]
-                else:
-                    raise
+            self._client = _get_client(self.api_key)
         else:
             # Legacy 0.x API
             _openai.api_key = self.api_key  # type: ignore[attr-defined]
 
-    def chat(self, messages: Iterable[ChatMessage], *, model: Optional[str] = None, temperature: float = 0.7, top_p: float = 1.0, max_tokens: int = 512) -> ChatMessage:
+        self.cache = cache if cache is not None else get_default_cache()
+        self.cache_max_temperature = _cache_max_temperature()
+        self.stats = STATS
+
+    def _cache_key(self, model_name: str, payload: list[dict], temperature: float, top_p: float, max_tokens: int, cache_seed: Optional[int]) -> Optional[str]:
+        # High-temperature sampling makes replies vary; only cache those when the caller opts in
+        if self.cache is None or (temperature > self.cache_max_temperature and cache_seed is None):
+            return None
+        return make_cache_key(
+            model=model_name,
+            messages=payload,
+            temperature=round(temperature, 3),
+            top_p=round(top_p, 3),
+            max_tokens=max_tokens,
+            cache_seed=cache_seed,
+        )
+
+    def _cached_content(self, key: Optional[str]) -> Optional[str]:
+        if key is None:
+            return None
+        cached = self.cache.get(key)  # type: ignore[union-attr]
+        if cached is None:
+            self.stats.record('misses')
+            return None
+        self.stats.record('hits')
+        return cached['content']
+
+    def chat(self, messages: Iterable[ChatMessage], *, model: Optional[str] = None, temperature: float = 0.7, top_p: float = 1.0, max_tokens: int = 512, cache_seed: Optional[int] = None) -> ChatMessage:
         model_name = model or os.environ.get('OPENAI_CHAT_MODEL', 'gpt-4o-mini')
-        payload = [{ 'role': m.role, 'content': m.content } for m in messages]
+        payload = build_payload(messages)
+        key = self._cache_key(model_name, payload, temperature, top_p, max_tokens, cache_seed)
+        cached = self._cached_content(key)
+        if cached is not None:
+            return ChatMessage(role='assistant', content=cached)
         if self._mode == 'v1':
             resp = self._client.chat.completions.create(  # type: ignore[union-attr]
                 model=model_name,
@@ -92,4 +251,104 @@ class OpenAIModel(AIModel):
             choice0 = resp['choices'][0]
             message = choice0.get('message') or {}
             content = (message.get('content') or '').strip()
+        if key is not None:
+            self.cache.set(key, {'content': content})  # type: ignore[union-attr]
+        return ChatMessage(role='assistant', content=content)
+
+    def chat_stream(self, messages: Iterable[ChatMessage], *, model: Optional[str] = None, temperature: float = 0.7, top_p: float = 1.0, max_tokens: int = 512, cache_seed: Optional[int] = None) -> Iterator[str]:
+        """Yield reply text deltas as the provider generates them (SSE `stream=True`)."""
+        model_name = model or os.environ.get('OPENAI_CHAT_MODEL', 'gpt-4o-mini')
+        payload = build_payload(messages)
+        key = self._cache_key(model_name, payload, temperature, top_p, max_tokens, cache_seed)
+        cached = self._cached_content(key)
+        if cached is not None:
+            yield cached
+            return
+        params = dict(model=model_name, messages=payload, temperature=temperature, top_p=top_p, max_tokens=max_tokens, stream=True)
+        parts: list[str] = []
+        if self._mode == 'v1':
+            for chunk in self._client.chat.completions.create(**params):  # type: ignore[union-attr]
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        else:
+            for chunk in _openai.ChatCompletion.create(**params):  # type: ignore[attr-defined]
+                delta = (chunk['choices'][0].get('delta') or {}).get('content')
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        if key is not None:
+            self.cache.set(key, {'content': ''.join(parts).strip()})  # type: ignore[union-attr]
+
+
+class AsyncOpenAIModel(OpenAIModel):
+    """OpenAI provider whose `achat`/`achat_stream` run on the event loop via `AsyncOpenAI`.
+
+    Used by websocket consumers so streamed tokens don't hop through the
+    thread pool. Falls back to the threaded default on legacy `openai`.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, cache: Optional[CacheBackend] = None):
+        super().__init__(api_key=api_key, cache=cache)
+        self._aclient = _get_async_client(self.api_key) if hasattr(_openai, 'AsyncOpenAI') else None
+
+    async def achat(self, messages: Iterable[ChatMessage], *, model: Optional[str] = None, temperature: float = 0.7, top_p: float = 1.0, max_tokens: int = 512, cache_seed: Optional[int] = None) -> ChatMessage:
+        if self._aclient is None:
+            return await super().achat(messages, model=model, temperature=temperature, top_p=top_p, max_tokens=max_tokens)
+        model_name = model or os.environ.get('OPENAI_CHAT_MODEL', 'gpt-4o-mini')
+        payload = build_payload(messages)
+        key = self._cache_key(model_name, payload, temperature, top_p, max_tokens, cache_seed)
+        cached = self._cached_content(key)
+        if cached is not None:
+            return ChatMessage(role='assistant', content=cached)
+        resp = await self._aclient.chat.completions.create(
+            model=model_name,
+            messages=payload,
+            temperature=temperature,
+            top_p=top_p,
+            max_tokens=max_tokens,
+        )
+        content = (resp.choices[0].message.content or '').strip()
+        if key is not None:
+            self.cache.set(key, {'content': content})  # type: ignore[union-attr]
         return ChatMessage(role='assistant', content=content)
+
+    async def achat_stream(self, messages: Iterable[ChatMessage], *, model: Optional[str] = None, temperature: float = 0.7, top_p: float = 1.0, max_tokens: int = 512, cache_seed: Optional[int] = None) -> AsyncIterator[str]:
+        if self._aclient is None:
+            async for delta in super().achat_stream(messages, model=model, temperature=temperature, top_p=top_p, max_tokens=max_tokens):
+                yield delta
+            return
+        model_name = model or os.environ.get('OPENAI_CHAT_MODEL', 'gpt-4o-mini')
+        payload = build_payload(messages)
+        key = self._cache_key(model_name, payload, temperature, top_p, max_tokens, cache_seed)
+        cached = self._cached_content(key)
+        if cached is not None:
+            yield cached
+            return
+        parts: list[str] = []
+        stream = await self._aclient.chat.completions.create(
+            model=model_name,
+            messages=payload,
+            temperature=temperature,
+            top_p=top_p,
+            max_tokens=max_tokens,
+            stream=True,
+        )
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                yield delta
+        if key is not None:
+            self.cache.set(key, {'content': ''.join(parts).strip()})  # type: ignore[union-attr]
+
+
+@lru_cache(maxsize=None)
+def get_model(model_class: type) -> AIModel:
+    """Return a process-wide instance of `model_class`.
+
+    Providers are stateless between calls, so sharing one instance keeps their
+    HTTP connection pools warm across requests.
+    """
+    return model_class()
@@ -1,3 +1,96 @@
-from django.test import TestCase
+import threading
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .cache import CacheStats, InMemoryLRU, RedisBackend, make_cache_key
+from .services import ChatMessage, EchoModel, OpenAIModel, build_payload
+
+
+class BuildPayloadTests(SimpleTestCase):
+    def test_stable_messages_lead_in_insertion_order(self):
+        messages = [
+            ChatMessage(role="user", content="hi"),
+            ChatMessage(role="system", content="rules", meta={"stable": True}),
+            ChatMessage(role="assistant", content="hello"),
+            ChatMessage(role="system", content="glossary", meta={"stable": True}),
+        ]
+        self.assertEqual(
+            [m["content"] for m in build_payload(messages)],
+            ["rules", "glossary", "hi", "hello"],
+        )
+        self.assertEqual(build_payload(messages)[0], {"role": "system", "content": "rules"})
+
+
+class CacheKeyTests(SimpleTestCase):
+    def test_key_ignores_argument_order(self):
+        messages = [{"role": "user", "content": "hi"}]
+        self.assertEqual(
+            make_cache_key(model="m", messages=messages, temperature=0.0),
+            make_cache_key(temperature=0.0, messages=messages, model="m"),
+        )
+
+    def test_key_changes_with_any_part(self):
+        base = dict(model="m", messages=[{"role": "user", "content": "hi"}], temperature=0.0)
+        key = make_cache_key(**base)
+        self.assertEqual(len(key), 64)
+        self.assertNotEqual(key, make_cache_key(**{**base, "model": "n"}))
+        self.assertNotEqual(key, make_cache_key(**{**base, "messages": [{"role": "user", "content": "hey"}]}))
+
+
+class CacheBackendTests(SimpleTestCase):
+    def test_stats_are_thread_safe(self):
+        stats = CacheStats()
+
+        def hit():
+            for _ in range(1000):
+                stats.record("hits")
+
+        threads = [threading.Thread(target=hit) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(stats.snapshot(), {"hits": 8000, "misses": 0, "errors": 0})
+
+    def test_redis_outage_fails_open(self):
+        backend = RedisBackend("redis://127.0.0.1:1/0")
+        with mock.patch("ai_models.cache.STATS") as stats, self.assertLogs("ai_models.cache", "WARNING") as logs:
+            self.assertIsNone(backend.get("k"))
+            backend.set("k", {"content": "x"})
+            backend.delete("k")
+        self.assertEqual(stats.record.call_count, 3)
+        self.assertEqual(len(logs.output), 3)
+
+
+class OpenAIModelCacheTests(SimpleTestCase):
+    def _model(self):
+        ai = OpenAIModel(api_key="test-key", cache=InMemoryLRU())
+        reply = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=" cached reply "))])
+        ai._client = mock.Mock()
+        ai._client.chat.completions.create.return_value = reply
+        return ai
+
+    def test_identical_requests_hit_the_cache(self):
+        ai = self._model()
+        messages = [ChatMessage(role="user", content="hi")]
+        first = ai.chat(messages, model="m", temperature=0.0)
+        second = ai.chat(messages, model="m", temperature=0.0)
+        self.assertEqual((first.content, second.content), ("cached reply", "cached reply"))
+        self.assertEqual(ai._client.chat.completions.create.call_count, 1)
+
+    def test_sampled_requests_are_not_cached(self):
+        ai = self._model()
+        messages = [ChatMessage(role="user", content="hi")]
+        ai.chat(messages, model="m", temperature=0.9)
+        ai.chat(messages, model="m", temperature=0.9)
+        self.assertEqual(ai._client.chat.completions.create.call_count, 2)
+
+
+class EchoModelTests(SimpleTestCase):
+    def test_echoes_the_last_user_message(self):
+        messages = [ChatMessage("user", "first"), ChatMessage("user", "second"), ChatMessage("assistant", "ok")]
+        self.assertEqual(EchoModel().chat(messages).content, "second")
+        self.assertEqual(EchoModel().chat(iter(messages)).content, "second")
+        self.assertEqual(EchoModel().chat([]).content, "(no input)")
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import ChatGenerateView
+from .views import ChatGenerateView, CacheStatsView
 
 urlpatterns = [
     path('chat/generate/', ChatGenerateView.as_view(), name='ai-chat-generate'),
+    path('cache/stats/', CacheStatsView.as_view(), name='ai-cache-stats'),
 ]
@@ -1,21 +1,71 @@
+import json
+
+from django.http import StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import permissions, status
 
-from .services import EchoModel, ChatMessage
+from .cache import STATS, get_default_cache
+from .services import EchoModel, ChatMessage, get_model
 
 
 class ChatGenerateView(APIView):
 	permission_classes = [permissions.IsAuthenticated]
 
 	def post(self, request):
-		# Expect messages: [{role, content}, ...]
+		"""Generate a reply for the posted conversation.
+
+		Ordering constraint: providers cache prompts by prefix, so messages marked
+		stable are sent ahead of all dynamic messages. The first system message is
+		treated as stable unless the client sends `"stable": false` for it; any
+		message may opt in with `"stable": true`. Keep per-request context
+		(retrieved memories, timestamps) out of stable messages.
+
+		Send `"stream": true` to receive the reply as server-sent events of the
+		form `data: {"delta": "..."}`.
+		"""
+		# Expect messages: [{role, content, stable?}, ...]
 		messages = request.data.get('messages') or []
-		norm = [ChatMessage(role=m.get('role', 'user'), content=m.get('content', '')) for m in messages if isinstance(m, dict)]
+		ai = get_model(EchoModel)
+		stream = request.data.get('stream')
+		if type(ai) is EchoModel and not stream and isinstance(messages, list):
+			# Echo only needs the last user turn; skip building ChatMessage objects
+			content = next((
+				m.get('content', '') for m in reversed(messages)
+				if isinstance(m, dict) and m.get('role', 'user') == 'user'
+			), '(no input)')
+			return Response({'role': 'assistant', 'content': content}, status=status.HTTP_200_OK)
+		norm = []
+		seen_system = False
+		for m in messages:
+			if not isinstance(m, dict):
+				continue
+			role = m.get('role', 'user')
+			stable = m.get('stable')
+			if stable is None:
+				stable = role == 'system' and not seen_system
+			if role == 'system':
+				seen_system = True
+			norm.append(ChatMessage(role=role, content=m.get('content', ''), meta={'stable': bool(stable)}))
 		model_name = request.data.get('model')
-		ai = EchoModel()
+		if stream:
+			events = (f"data: {json.dumps({'delta': t})}\n\n" for t in ai.chat_stream(norm, model=model_name))
+			response = StreamingHttpResponse(events, content_type='text/event-stream')
+			response['Cache-Control'] = 'no-cache'
+			return response
 		out = ai.chat(norm, model=model_name)
 		return Response({
 			'role': out.role,
 			'content': out.content,
 		}, status=status.HTTP_200_OK)
+
+
+class CacheStatsView(APIView):
+	permission_classes = [permissions.IsAdminUser]
+
+	def get(self, request):
+		backend = get_default_cache()
+		return Response({
+			'backend': type(backend).__name__ if backend is not None else None,
+			**STATS.snapshot(),
+		}, status=status.HTTP_200_OK)
@@ -1,8 +1,9 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
 from django.contrib.admin import SimpleListFilter
+from django.utils import timezone
 
-from .models import User
+from .models import AdminInvite, User
 
 
 class ApprovalStatusFilter(SimpleListFilter):
@@ -84,3 +85,28 @@ class UserAdmin(DjangoUserAdmin):
         self.message_user(request, f"Deactivated {updated} user(s).")
 
     deactivate_users.short_description = "Deactivate selected users"
+
+
+@admin.register(AdminInvite)
+class AdminInviteAdmin(admin.ModelAdmin):
+    """Admin panel configuration for invite codes."""
+
+    list_display = ("email", "role", "created_by", "created_at", "expires_at", "used_at", "invited_user")
+    list_filter = ("role",)
+    search_fields = ("email",)
+    ordering = ("-created_at",)
+    readonly_fields = ("code_hash", "created_at", "used_at", "invited_user")
+
+    # Bulk actions
+    actions = ["expire_invites"]
+
+    def has_add_permission(self, request):
+        # Invites are issued through the API, which returns the plaintext code once;
+        # an admin-created row would have no code_hash and could never be redeemed.
+        return False
+
+    def expire_invites(self, request, queryset):
+        updated = queryset.filter(used_at__isnull=True).update(used_at=timezone.now())
+        self.message_user(request, f"Expired {updated} invite(s).")
+
+    expire_invites.short_description = "Expire selected invites (mark as used)"
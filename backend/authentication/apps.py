@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'authentication'
+
+    def ready(self):
+        # Build the validator list at startup so CommonPasswordValidator reads
+        # its gzipped word list once per process instead of on the first request.
+        from django.contrib.auth.password_validation import get_default_password_validators
+
+        get_default_password_validators()
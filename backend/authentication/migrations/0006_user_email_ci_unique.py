@@ -0,0 +1,55 @@
+# Generated by Django 5.0.7 on 2026-10-15 09:24
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def check_case_insensitive_duplicates(apps, schema_editor):
+    """Stop with a readable report if emails collide once lowercased.
+
+    Which account keeps a shared email is an admin decision, so nothing is
+    rewritten here; fix the listed users and re-run the migration.
+    """
+    User = apps.get_model("authentication", "User")
+    duplicates = list(
+        User.objects.exclude(email="")
+        .exclude(email__isnull=True)
+        .annotate(email_ci=Lower("email"))
+        .values("email_ci")
+        .annotate(n=Count("id"))
+        .filter(n__gt=1)
+        .values_list("email_ci", flat=True)
+    )
+    if not duplicates:
+        return
+    lines = []
+    for email in duplicates:
+        ids = User.objects.annotate(email_ci=Lower("email")).filter(email_ci=email).values_list("id", flat=True)
+        lines.append(f"  {email}: user ids {', '.join(str(pk) for pk in ids)}")
+    raise RuntimeError(
+        "Cannot add the case-insensitive unique email constraint; these emails are shared "
+        "by several accounts once lowercased:\n" + "\n".join(lines) +
+        "\nGive each account a distinct email (or clear it) and run migrate again."
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('authentication', '0005_passwordreset'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_case_insensitive_duplicates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='user_email_ci_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), condition=models.Q(('email', ''), _negated=True), name='user_email_ci_unique'),
+        ),
+    ]
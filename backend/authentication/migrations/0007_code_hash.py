@@ -0,0 +1,59 @@
+import hashlib
+import hmac
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def hash_existing_codes(apps, schema_editor):
+    """Store the HMAC of every existing code and drop the plaintext."""
+    key = settings.INVITE_HMAC_KEY.encode()
+    for model_name in ("AdminInvite", "PasswordReset"):
+        Model = apps.get_model("authentication", model_name)
+        rows = list(Model.objects.exclude(code__isnull=True).only("id", "code"))
+        for row in rows:
+            row.code_hash = hmac.new(key, row.code.encode(), hashlib.sha256).hexdigest()
+            row.code = None
+        Model.objects.bulk_update(rows, ["code_hash", "code"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0006_user_email_ci_unique'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='admininvite',
+            name='code',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AlterField(
+            model_name='passwordreset',
+            name='code',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='admininvite',
+            name='code_hash',
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='passwordreset',
+            name='code_hash',
+            field=models.CharField(max_length=64, null=True),
+        ),
+        # Plaintext codes cannot be restored once hashed
+        migrations.RunPython(hash_existing_codes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='admininvite',
+            name='code_hash',
+            field=models.CharField(db_index=True, max_length=64, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='passwordreset',
+            name='code_hash',
+            field=models.CharField(db_index=True, max_length=64, unique=True),
+        ),
+    ]
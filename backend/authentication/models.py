@@ -1,9 +1,21 @@
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
 from django.utils import timezone
+import hashlib
+import hmac
 import secrets
 
+# Enables `email__lower=...` lookups, which match the functional index below
+models.EmailField.register_lookup(Lower)
+
+
+def hmac_digest(code: str) -> str:
+    """Keyed SHA-256 of a one-time code; only this digest is stored and indexed."""
+    return hmac.new(settings.INVITE_HMAC_KEY.encode(), code.encode(), hashlib.sha256).hexdigest()
+
 
 class User(AbstractUser):
     """Custom user model based on Django's AbstractUser with role support."""
@@ -24,11 +36,21 @@ class User(AbstractUser):
     department: str | None = models.CharField(max_length=100, blank=True, null=True)
     avatar_url: str | None = models.URLField(blank=True, null=True)
 
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            models.UniqueConstraint(Lower("email"), condition=~Q(email=""), name="user_email_ci_unique"),
+        ]
+        indexes = [
+            models.Index(Lower("email"), name="user_email_ci_idx"),
+        ]
+
 
 class AdminInvite(models.Model):
     """Invite token to allow creating accounts via a one-time code, for any role."""
 
-    code = models.CharField(max_length=64, unique=True, db_index=True)
+    # Legacy plaintext column; new invites only persist code_hash
+    code = models.CharField(max_length=64, blank=True, null=True)
+    code_hash = models.CharField(max_length=64, unique=True, db_index=True)
     email = models.EmailField(blank=True, null=True)
     role = models.CharField(
         max_length=32,
@@ -65,7 +87,7 @@ class AdminInvite(models.Model):
 
     def __str__(self) -> str:  # pragma: no cover
         status = "used" if self.is_used else ("expired" if self.is_expired else "active")
-        return f"AdminInvite({self.code[:6]}…, {self.role}, {status})"
+        return f"AdminInvite({self.code_hash[:6]}…, {self.role}, {status})"
 
 
 class PasswordReset(models.Model):
@@ -76,7 +98,9 @@ class PasswordReset(models.Model):
         on_delete=models.CASCADE,
         related_name="password_resets",
     )
-    code = models.CharField(max_length=64, unique=True, db_index=True)
+    # Legacy plaintext column; new resets only persist code_hash
+    code = models.CharField(max_length=64, blank=True, null=True)
+    code_hash = models.CharField(max_length=64, unique=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
     used_at = models.DateTimeField(blank=True, null=True)
@@ -1,4 +1,4 @@
-from typing import Set
+from typing import FrozenSet
 
 from rest_framework.permissions import BasePermission
 from rest_framework.request import Request
@@ -7,31 +7,25 @@ from rest_framework.request import Request
 class RolePermission(BasePermission):
     """Base permission that allows access only to users with specific roles."""
 
-    required_roles: Set[str] = set()
+    required_roles: FrozenSet[str] = frozenset()
 
     def has_permission(self, request: Request, view) -> bool:
-        user = getattr(request, "user", None)
-        if not user or not user.is_authenticated:
-            return False
-
-        role = getattr(user, "role", None)
-        if not role:
-            return False
-
-        return role in self.required_roles
+        # Anonymous users short-circuit on is_authenticated; every User has a role
+        user = request.user
+        return user.is_authenticated and user.role in self.required_roles
 
 
 class IsAdmin(RolePermission):
-    required_roles = {"admin"}
+    required_roles = frozenset({"admin"})
 
 
 class IsInstructor(RolePermission):
-    required_roles = {"instructor"}
+    required_roles = frozenset({"instructor"})
 
 
 class IsUser(RolePermission):
-    required_roles = {"user"}
+    required_roles = frozenset({"user"})
 
 
 class IsAdminOrInstructor(RolePermission):
-    required_roles = {"admin", "instructor"}
+    required_roles = frozenset({"admin", "instructor"})
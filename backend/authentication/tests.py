@@ -1,3 +1,176 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib import admin
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import AdminInvite, PasswordReset, User, hmac_digest
+
+
+class RegisterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User.objects.create_user(username="taken", email="taken@example.com", password="Sturdy-pass-987")
+
+    def _register(self, username: str, email: str):
+        return self.client.post(
+            "/api/auth/register/",
+            {"username": username, "email": email, "password": "Sturdy-pass-987"},
+            format="json",
+        )
+
+    def test_username_conflict(self):
+        response = self._register("taken", "other@example.com")
+        self.assertEqual(response.data["detail"], "Username already taken.")
+
+    def test_email_conflict_ignores_case(self):
+        response = self._register("other", "Taken@Example.com")
+        self.assertEqual(response.data["detail"], "Email already in use.")
+
+    def test_new_account_is_inactive(self):
+        response = self._register("fresh", "Fresh@Example.com")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["email"], "fresh@example.com")
+        self.assertFalse(response.data["is_active"])
+
+
+class PasswordResetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="Zq8kLm2Wp5rT9vXy3BnJ", email="reset@example.com", password="Original-pass-123"
+        )
+
+    def _reset_code(self, **kwargs) -> str:
+        code = PasswordReset.generate_code()
+        PasswordReset.objects.create(
+            user=self.user,
+            code_hash=hmac_digest(code),
+            expires_at=kwargs.get("expires_at", timezone.now() + timezone.timedelta(hours=1)),
+        )
+        return code
+
+    def _perform(self, code: str, password: str = "Brand-new-pass-456"):
+        return self.client.post("/api/auth/password-reset/perform/", {"code": code, "password": password}, format="json")
+
+    def test_request_stores_only_the_digest(self):
+        response = self.client.post("/api/auth/password-reset/request/", {"email": "RESET@example.com"}, format="json")
+        reset = PasswordReset.objects.get()
+        self.assertIsNone(reset.code)
+        self.assertEqual(reset.code_hash, hmac_digest(response.data["code"]))
+
+    def test_request_for_unknown_email_reveals_nothing(self):
+        response = self.client.post("/api/auth/password-reset/request/", {"email": "nobody@example.com"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("code", response.data)
+        self.assertFalse(PasswordReset.objects.exists())
+
+    def test_code_resets_the_password_once(self):
+        code = self._reset_code()
+        self.assertEqual(self._perform(code).status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("Brand-new-pass-456"))
+        response = self._perform(code, "Another-pass-789")
+        self.assertEqual(response.data["detail"], "Code already used.")
+
+    def test_expired_and_unknown_codes_are_rejected(self):
+        code = self._reset_code(expires_at=timezone.now() - timezone.timedelta(seconds=1))
+        self.assertEqual(self._perform(code).data["detail"], "Code expired.")
+        self.assertEqual(self._perform("not-a-code").data["detail"], "Invalid code.")
+
+    def test_claim_is_guarded_against_a_concurrent_reset(self):
+        # The row was claimed after this request read it; the guarded UPDATE must not succeed
+        code = self._reset_code()
+        PasswordReset.objects.update(used_at=timezone.now())
+        with mock.patch.object(PasswordReset, "is_used", new_callable=mock.PropertyMock, return_value=False):
+            response = self._perform(code)
+        self.assertEqual(response.data["detail"], "Code already used.")
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("Original-pass-123"))
+
+    def test_long_password_matching_username_is_rejected(self):
+        code = self._reset_code()
+        response = self.client.post(
+            "/api/auth/password-reset/perform/", {"code": code, "password": self.user.username}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("Original-pass-123"))
+
+
+class AdminInviteTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(username="root", email="root@example.com", password="Admin-pass-123")
+
+    def _invite(self, **kwargs) -> tuple[str, AdminInvite]:
+        code = AdminInvite.generate_code()
+        invite = AdminInvite.objects.create(
+            code_hash=hmac_digest(code),
+            expires_at=timezone.now() + timezone.timedelta(hours=1),
+            **kwargs,
+        )
+        return code, invite
+
+    def _register(self, code: str, username: str):
+        return self.client.post(
+            "/api/auth/invite/register/",
+            {"code": code, "email": f"{username}@example.com", "username": username, "password": "Sturdy-pass-987"},
+            format="json",
+        )
+
+    def test_created_invite_stores_only_the_digest(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post("/api/auth/invite/create/", {"role": "instructor"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        invite = AdminInvite.objects.get()
+        self.assertIsNone(invite.code)
+        self.assertEqual(invite.code_hash, hmac_digest(response.data["code"]))
+
+    def test_invite_is_single_use(self):
+        code, invite = self._invite()
+        self.assertEqual(self._register(code, "first").status_code, 201)
+        response = self._register(code, "second")
+        self.assertEqual(response.status_code, 400)
+        invite.refresh_from_db()
+        self.assertEqual(invite.invited_user.username, "first")
+        self.assertFalse(User.objects.filter(username="second").exists())
+
+    def test_admin_cannot_add_invites(self):
+        request = RequestFactory().get("/admin/")
+        request.user = self.admin
+        self.assertFalse(admin.site._registry[AdminInvite].has_add_permission(request))
+
+    def test_expire_action_keeps_redemption_details(self):
+        used_at = timezone.now() - timezone.timedelta(hours=1)
+        _, used = self._invite(used_at=used_at, invited_user=self.admin)
+        _, fresh = self._invite()
+        model_admin = admin.site._registry[AdminInvite]
+        with mock.patch.object(model_admin, "message_user"):
+            model_admin.expire_invites(None, AdminInvite.objects.all())
+        used.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(used.used_at, used_at)
+        self.assertEqual(used.invited_user, self.admin)
+        self.assertIsNotNone(fresh.used_at)
+
+
+class MeTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="me", email="me@example.com", password="Sturdy-pass-987")
+        self.client.force_authenticate(self.user)
+
+    def test_profile_cache_varies_on_authorization(self):
+        response = self.client.get("/api/auth/me/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("private", response["Cache-Control"])
+        self.assertIn("Authorization", response["Vary"])
+        self.assertEqual(response.data["username"], "me")
+
+    def test_patch_writes_only_changed_fields(self):
+        response = self.client.patch("/api/auth/me/", {"first_name": " Ada ", "email": "ME@example.com"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.first_name, self.user.email), ("Ada", "me@example.com"))
@@ -6,12 +6,42 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from django.db import transaction
+from django.db.models import Exists, Q
 
-from .models import AdminInvite, PasswordReset
+from .models import AdminInvite, PasswordReset, hmac_digest
 
 User = get_user_model()
 
+_PROFILE_FIELDS = (
+    "id",
+    "username",
+    "email",
+    "first_name",
+    "last_name",
+    "role",
+    "department",
+    "avatar_url",
+    "is_staff",
+    "is_superuser",
+)
+
+_ROLE_VALUES = frozenset(User.Roles.values)
+_DEFAULT_ROLE = User.Roles.USER
+
+
+def _find_identity_conflict(username: str, email: str) -> str | None:
+    """Return an error message if the username or email (case-insensitive) is taken."""
+    # At most two rows can match: one by username and one by email
+    taken = list(
+        User.objects.filter(Q(username=username) | Q(email__lower=email))
+        .values_list("username", flat=True)[:2]
+    )
+    if not taken:
+        return None
+    return "Username already taken." if username in taken else "Email already in use."
+
 
 @api_view(["POST"])
 @permission_classes([permissions.AllowAny])
@@ -24,16 +54,14 @@ def register(request):
     password = data.get("password") or ""
     first_name = (data.get("first_name") or "").strip()
     last_name = (data.get("last_name") or "").strip()
-    role = (data.get("role") or User.Roles.USER).strip() if hasattr(User, "Roles") else "user"
+    role = (data.get("role") or _DEFAULT_ROLE).strip()
 
     if not username or not email or not password:
         return Response({"detail": "username, email, and password are required."}, status=status.HTTP_400_BAD_REQUEST)
 
-    if User.objects.filter(username=username).exists():
-        return Response({"detail": "Username already taken."}, status=status.HTTP_400_BAD_REQUEST)
-
-    if User.objects.filter(email=email).exists():
-        return Response({"detail": "Email already in use."}, status=status.HTTP_400_BAD_REQUEST)
+    conflict = _find_identity_conflict(username, email)
+    if conflict:
+        return Response({"detail": conflict}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
         validate_password(password)
@@ -46,7 +74,7 @@ def register(request):
         password=password,
         first_name=first_name,
         last_name=last_name,
-        role=role if role in getattr(User.Roles, "values", []) else getattr(User.Roles, "USER", "user"),
+        role=role if role in _ROLE_VALUES else _DEFAULT_ROLE,
     )
 
     # Require admin approval: keep inactive until approved
@@ -61,20 +89,20 @@ def register(request):
 def create_admin_invite(request):
     """Create an invite code for any role (default: user) valid for 48 hours."""
     email = (request.data.get("email") or "").strip().lower() or None
-    role = (request.data.get("role") or getattr(User.Roles, "USER", "user")).strip()
-    if hasattr(User, "Roles") and role not in [c for c, _ in User.Roles.choices]:
-        role = getattr(User.Roles, "USER", "user")
+    role = (request.data.get("role") or _DEFAULT_ROLE).strip()
+    if role not in _ROLE_VALUES:
+        role = _DEFAULT_ROLE
 
     code = AdminInvite.generate_code()
     invite = AdminInvite.objects.create(
-        code=code,
+        code_hash=hmac_digest(code),
         email=email,
         role=role,
         created_by=request.user,
         expires_at=timezone.now() + timezone.timedelta(hours=48),
     )
 
-    return Response({"code": invite.code, "role": invite.role, "expires_at": invite.expires_at}, status=status.HTTP_201_CREATED)
+    return Response({"code": code, "role": invite.role, "expires_at": invite.expires_at}, status=status.HTTP_201_CREATED)
 
 
 @api_view(["POST"])
@@ -90,24 +118,32 @@ def register_admin_with_invite(request):
     if not all([code, email, username, password]):
         return Response({"detail": "code, email, username, password are required."}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        invite = AdminInvite.objects.get(code=code)
-    except AdminInvite.DoesNotExist:
+    # One query fetches the invite together with both identity conflict checks
+    invite = (
+        AdminInvite.objects.filter(code_hash=hmac_digest(code))
+        .annotate(
+            username_taken=Exists(User.objects.filter(username=username)),
+            email_taken=Exists(User.objects.filter(email__lower=email)),
+        )
+        .values("id", "role", "email", "used_at", "expires_at", "username_taken", "email_taken")
+        .first()
+    )
+    if invite is None:
         return Response({"detail": "Invalid invite code."}, status=status.HTTP_400_BAD_REQUEST)
 
-    if invite.is_used:
+    if invite["used_at"] is not None:
         return Response({"detail": "Invite already used."}, status=status.HTTP_400_BAD_REQUEST)
 
-    if invite.is_expired:
+    now = timezone.now()
+    if now >= invite["expires_at"]:
         return Response({"detail": "Invite expired."}, status=status.HTTP_400_BAD_REQUEST)
 
-    if invite.email and invite.email != email:
+    if invite["email"] and invite["email"] != email:
         return Response({"detail": "Invite email does not match."}, status=status.HTTP_400_BAD_REQUEST)
 
-    if User.objects.filter(username=username).exists():
+    if invite["username_taken"]:
         return Response({"detail": "Username already taken."}, status=status.HTTP_400_BAD_REQUEST)
-
-    if User.objects.filter(email=email).exists():
+    if invite["email_taken"]:
         return Response({"detail": "Email already in use."}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
@@ -115,19 +151,23 @@ def register_admin_with_invite(request):
     except ValidationError as exc:
         return Response({"detail": exc.messages}, status=status.HTTP_400_BAD_REQUEST)
 
-    is_admin = invite.role == getattr(User.Roles, "ADMIN", "admin")
-
-    user = User.objects.create_user(
-        username=username,
-        email=email,
-        password=password,
-        role=invite.role,
-        is_active=True if is_admin else False,
-        is_staff=True if is_admin else False,
-        is_superuser=True if is_admin else False,
-    )
+    is_admin = invite["role"] == User.Roles.ADMIN
 
-    invite.mark_used(user)
+    with transaction.atomic():
+        user = User.objects.create_user(
+            username=username,
+            email=email,
+            password=password,
+            role=invite["role"],
+            is_active=True if is_admin else False,
+            is_staff=True if is_admin else False,
+            is_superuser=True if is_admin else False,
+        )
+        # The used_at predicate makes redemption single-use under concurrent requests
+        claimed = AdminInvite.objects.filter(pk=invite["id"], used_at__isnull=True).update(used_at=now, invited_user=user)
+        if not claimed:
+            transaction.set_rollback(True)
+            return Response({"detail": "Invite already used."}, status=status.HTTP_400_BAD_REQUEST)
 
     return Response({"id": user.id, "username": user.username, "email": user.email, "role": user.role, "is_active": user.is_active}, status=status.HTTP_201_CREATED)
 
@@ -141,20 +181,21 @@ def request_password_reset(request):
         return Response({"detail": "email is required."}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        user = User.objects.get(email=email)
+        user = User.objects.get(email__lower=email)
     except User.DoesNotExist:
         # Do not reveal existence; return 200
         return Response({"detail": "If the email exists, a reset link has been sent."}, status=status.HTTP_200_OK)
 
     # Create token valid for 1 hour
-    reset = PasswordReset.objects.create(
+    code = PasswordReset.generate_code()
+    PasswordReset.objects.create(
         user=user,
-        code=PasswordReset.generate_code(),
+        code_hash=hmac_digest(code),
         expires_at=timezone.now() + timezone.timedelta(hours=1),
     )
 
     # TODO: send email with code
-    return Response({"detail": "If the email exists, a reset link has been sent.", "code": reset.code}, status=status.HTTP_200_OK)
+    return Response({"detail": "If the email exists, a reset link has been sent.", "code": code}, status=status.HTTP_200_OK)
 
 
 @api_view(["POST"])
@@ -167,30 +208,45 @@ def perform_password_reset(request):
     if not code or not password:
         return Response({"detail": "code and password are required."}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        reset = PasswordReset.objects.select_related("user").get(code=code)
-    except PasswordReset.DoesNotExist:
-        return Response({"detail": "Invalid code."}, status=status.HTTP_400_BAD_REQUEST)
-
-    if reset.is_used:
-        return Response({"detail": "Code already used."}, status=status.HTTP_400_BAD_REQUEST)
-
-    if reset.is_expired:
-        return Response({"detail": "Code expired."}, status=status.HTTP_400_BAD_REQUEST)
-
-    try:
-        validate_password(password, user=reset.user)
-    except ValidationError as exc:
-        return Response({"detail": exc.messages}, status=status.HTTP_400_BAD_REQUEST)
-
+    code_hash = hmac_digest(code)
     with transaction.atomic():
+        # Lock the reset row; a concurrent request holding it gets a 409 instead of racing
+        reset = (
+            PasswordReset.objects.select_related("user")
+            .select_for_update(skip_locked=True, of=("self",))
+            .filter(code_hash=code_hash)
+            .first()
+        )
+        if reset is None:
+            if PasswordReset.objects.filter(code_hash=code_hash).exists():
+                return Response({"detail": "Reset already in progress."}, status=status.HTTP_409_CONFLICT)
+            return Response({"detail": "Invalid code."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if reset.is_used:
+            return Response({"detail": "Code already used."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if reset.is_expired:
+            return Response({"detail": "Code expired."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            validate_password(password, user=reset.user)
+        except ValidationError as exc:
+            return Response({"detail": exc.messages}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The used_at predicate keeps this single-use on backends without row locks (SQLite)
+        if not PasswordReset.objects.filter(pk=reset.pk, used_at__isnull=True).update(used_at=timezone.now()):
+            return Response({"detail": "Code already used."}, status=status.HTTP_400_BAD_REQUEST)
         reset.user.set_password(password)
-        reset.user.save(update_fields=["password"])
-        reset.mark_used()
+        User.objects.filter(pk=reset.user_id).update(password=reset.user.password)
 
     return Response({"detail": "Password has been reset."}, status=status.HTTP_200_OK)
 
 
+def _profile(u) -> dict:
+    """Serialize the profile fields returned by the `me` endpoint."""
+    return {field: getattr(u, field) for field in _PROFILE_FIELDS}
+
+
 @api_view(["GET", "PATCH"])
 @permission_classes([permissions.IsAuthenticated])
 def me(request):
@@ -198,49 +254,32 @@ def me(request):
     u = request.user
 
     if request.method == "GET":
-        return Response({
-            "id": u.id,
-            "username": u.username,
-            "email": u.email,
-            "first_name": getattr(u, "first_name", ""),
-            "last_name": getattr(u, "last_name", ""),
-            "role": getattr(u, "role", None),
-            "department": getattr(u, "department", None),
-            "avatar_url": getattr(u, "avatar_url", None),
-            "is_staff": getattr(u, "is_staff", False),
-            "is_superuser": getattr(u, "is_superuser", False),
-        }, status=status.HTTP_200_OK)
+        response = Response(_profile(u), status=status.HTTP_200_OK)
+        # The navbar polls this endpoint; let the browser reuse it briefly, but
+        # never across a token change (logout/login as someone else)
+        patch_cache_control(response, private=True, max_age=5)
+        patch_vary_headers(response, ["Authorization"])
+        return response
 
     data = request.data or {}
 
-    email = (data.get("email") or u.email or "").strip().lower()
-    first_name = (data.get("first_name") or u.first_name or "").strip()
-    last_name = (data.get("last_name") or u.last_name or "").strip()
-    department = (data.get("department") or getattr(u, "department", None)) or None
-    avatar_url = (data.get("avatar_url") or getattr(u, "avatar_url", None)) or None
+    updates = {
+        "email": (data.get("email") or u.email or "").strip().lower(),
+        "first_name": (data.get("first_name") or u.first_name or "").strip(),
+        "last_name": (data.get("last_name") or u.last_name or "").strip(),
+        "department": (data.get("department") or u.department) or None,
+        "avatar_url": (data.get("avatar_url") or u.avatar_url) or None,
+    }
 
-    if email and User.objects.exclude(pk=u.pk).filter(email=email).exists():
+    email = updates["email"]
+    if email and User.objects.exclude(pk=u.pk).filter(email__lower=email).exists():
         return Response({"detail": "Email already in use."}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Update fields
-    u.email = email
-    u.first_name = first_name
-    u.last_name = last_name
-    if hasattr(u, "department"):
-        u.department = department
-    if hasattr(u, "avatar_url"):
-        u.avatar_url = avatar_url
-    u.save()
-
-    return Response({
-        "id": u.id,
-        "username": u.username,
-        "email": u.email,
-        "first_name": u.first_name,
-        "last_name": u.last_name,
-        "role": getattr(u, "role", None),
-        "department": getattr(u, "department", None),
-        "avatar_url": getattr(u, "avatar_url", None),
-        "is_staff": getattr(u, "is_staff", False),
-        "is_superuser": getattr(u, "is_superuser", False),
-    }, status=status.HTTP_200_OK)
+    # Only write the columns that actually changed
+    changed = [field for field, value in updates.items() if getattr(u, field) != value]
+    for field in changed:
+        setattr(u, field, updates[field])
+    if changed:
+        u.save(update_fields=changed)
+
+    return Response(_profile(u), status=status.HTTP_200_OK)
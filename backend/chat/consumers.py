@@ -1,10 +1,38 @@
+import asyncio
+import threading
+
+import orjson
+from cachetools import TTLCache
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
-from asyncio import sleep
+from ai_models.services import AsyncOpenAIModel, ChatMessage, EchoModel, get_model
 from .models import Conversation
 
+# conversation id -> owner id for recent handshakes, so reconnect storms skip
+# the ownership query; invalidated by chat.signals on save/delete
+_OWNER_CACHE: TTLCache = TTLCache(maxsize=10000, ttl=60)
+_OWNER_LOCK = threading.Lock()
+
+# Streamed tokens are batched into one websocket frame per interval (seconds)
+DELTA_FLUSH_INTERVAL = 0.025
+
+
+def forget_conversation_owner(convo_id) -> None:
+    with _OWNER_LOCK:
+        _OWNER_CACHE.pop(convo_id, None)
+
+
 class ChatConsumer(AsyncJsonWebsocketConsumer):
+    @classmethod
+    async def decode_json(cls, text_data):
+        return orjson.loads(text_data)
+
+    @classmethod
+    async def encode_json(cls, content):
+        return orjson.dumps(content).decode()
+
     async def connect(self):
         self.conversation_id = self.scope['url_route']['kwargs'].get('conversation_id')
         user = self.scope.get('user')
@@ -37,13 +65,26 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
             if not prompt.strip():
                 await self.send_json({"type": "error", "detail": "content is required"})
                 return
-            # Simulate streaming events: start -> a few deltas -> end
+            params = content.get('params') or {}
+            try:
+                ai = get_model(AsyncOpenAIModel if getattr(settings, 'USE_OPENAI', False) else EchoModel)
+                stream = ai.achat_stream(
+                    [ChatMessage(role='user', content=prompt)],
+                    model=params.get('model') or None,
+                    temperature=float(params.get('temperature', 0.7)),
+                    top_p=float(params.get('top_p', 1.0)),
+                    max_tokens=int(params.get('max_tokens', 512)),
+                )
+            except Exception as e:
+                await self.send_json({"type": "error", "detail": f"Provider not available: {e}", "request_id": req_id})
+                return
+            # Stream events: start -> provider deltas -> end
             await self.send_json({"type": "message_start", "role": "assistant", "request_id": req_id})
-            # naive chunking of a canned response for demo; real impl would call provider
-            chunks = ["Thinking", ".", ".", ".", "\n", "Echo: ", prompt[:64]]
-            for ch in chunks:
-                await sleep(0.15)
-                await self.send_json({"type": "delta", "content": ch, "request_id": req_id})
+            try:
+                await self._send_deltas(stream, req_id)
+            except Exception as e:
+                await self.send_json({"type": "error", "detail": str(e), "request_id": req_id})
+                return
             await self.send_json({"type": "message_end", "request_id": req_id})
             return
         # Default: echo payloads back (dev aid)
@@ -52,12 +93,51 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
             {"type": "chat.message", "payload": content}
         )
 
+    async def _send_deltas(self, stream, req_id):
+        """Forward provider deltas, coalescing tokens into one frame per flush interval."""
+        buf = []
+
+        async def flush_later():
+            await asyncio.sleep(DELTA_FLUSH_INTERVAL)
+            await self._flush_deltas(buf, req_id)
+
+        flusher = None
+        try:
+            async for delta in stream:
+                buf.append(delta)
+                if flusher is None or flusher.done():
+                    flusher = asyncio.create_task(flush_later())
+        finally:
+            if flusher is not None:
+                await flusher
+        await self._flush_deltas(buf, req_id)
+
+    async def _flush_deltas(self, buf, req_id):
+        if not buf:
+            return
+        # Join and clear before awaiting so tokens appended meanwhile go in the next frame
+        text = ''.join(buf)
+        buf.clear()
+        await self.send_json({"type": "delta", "content": text, "request_id": req_id})
+
     async def chat_message(self, event):
         await self.send_json(event.get('payload', {}))
 
+    async def _owns_conversation(self, user_id, convo_id):
+        with _OWNER_LOCK:
+            owner_id = _OWNER_CACHE.get(convo_id)
+        if owner_id is None:
+            owner_id = await self._fetch_owner_id(convo_id)
+            if owner_id is None:
+                # Unknown conversations are not cached so a later create is seen at once
+                return False
+            with _OWNER_LOCK:
+                _OWNER_CACHE[convo_id] = owner_id
+        return owner_id == user_id
+
     @database_sync_to_async
-    def _owns_conversation(self, user_id, convo_id):
+    def _fetch_owner_id(self, convo_id):
         try:
-            return Conversation.objects.filter(id=convo_id, owner_id=user_id).exists()
+            return Conversation.objects.filter(id=convo_id).values_list('owner_id', flat=True).first()
         except Exception:
-            return False
+            return None
@@ -1,18 +1,103 @@
+from django.db import models
 from rest_framework import serializers
 from .models import Conversation, Message
 
 
-class MessageSerializer(serializers.ModelSerializer):
+_created_at_field = serializers.DateTimeField()
+
+
+class MessageListSerializer(serializers.ListSerializer):
+    """Builds message dicts directly instead of running each child field.
+
+    Must stay in sync with MessageReadSerializer.Meta.fields.
+    """
+
+    def to_representation(self, data):
+        rows = data.all() if isinstance(data, models.manager.BaseManager) else data
+        return [
+            {
+                'id': m.id,
+                'role': m.role,
+                'content': m.content,
+                'model': m.model,
+                'prompt_tokens': m.prompt_tokens,
+                'completion_tokens': m.completion_tokens,
+                'created_at': _created_at_field.to_representation(m.created_at),
+            }
+            for m in rows
+        ]
+
+
+class MessageReadSerializer(serializers.ModelSerializer):
+    """Output-only message representation; skips writable-field setup."""
+
     class Meta:
         model = Message
         fields = ['id', 'role', 'content', 'model', 'prompt_tokens', 'completion_tokens', 'created_at']
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = fields
+        list_serializer_class = MessageListSerializer
+
+
+# Shared, unbound list serializer so the child's fields are built once per process
+# rather than deep-copied on every request; only to_representation() is used.
+MESSAGE_LIST_SERIALIZER = MessageReadSerializer(many=True)
+
+
+class MessageWriteSerializer(serializers.ModelSerializer):
+    """Validates client-posted messages; responses use MessageReadSerializer."""
+
+    class Meta:
+        model = Message
+        fields = ['role', 'content', 'model', 'prompt_tokens', 'completion_tokens']
+
+
+class ConversationListSerializer(serializers.ModelSerializer):
+    """Conversation summary for list views; messages are fetched via the messages action."""
+
+    class Meta:
+        model = Conversation
+        fields = ['id', 'title', 'created_at', 'updated_at']
+        read_only_fields = fields
 
 
 class ConversationSerializer(serializers.ModelSerializer):
-    messages = MessageSerializer(many=True, read_only=True)
+    messages = MessageReadSerializer(many=True, read_only=True)
 
     class Meta:
         model = Conversation
         fields = ['id', 'title', 'created_at', 'updated_at', 'messages']
         read_only_fields = ['id', 'created_at', 'updated_at', 'messages']
+
+
+class _ClampedMixin:
+    """Clamp to [lower, upper]; missing, null or unparsable input falls back to the default."""
+
+    def __init__(self, *, lower, upper, **kwargs):
+        self.lower, self.upper = lower, upper
+        super().__init__(**kwargs)
+
+    def run_validation(self, data=serializers.empty):
+        try:
+            value = super().run_validation(data)
+        except serializers.ValidationError:
+            value = None
+        if value is None:
+            return self.default
+        return max(self.lower, min(self.upper, value))
+
+
+class ClampedFloatField(_ClampedMixin, serializers.FloatField):
+    pass
+
+
+class ClampedIntegerField(_ClampedMixin, serializers.IntegerField):
+    pass
+
+
+class GenerateParamsSerializer(serializers.Serializer):
+    """Coerces and clamps the sampling parameters accepted by `generate`."""
+
+    model = serializers.CharField(required=False, allow_null=True, allow_blank=True, default=None)
+    temperature = ClampedFloatField(lower=0.0, upper=1.0, default=0.7)
+    top_p = ClampedFloatField(lower=0.0, upper=1.0, default=1.0)
+    max_tokens = ClampedIntegerField(lower=1, upper=2048, default=512)
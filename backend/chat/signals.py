@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .consumers import forget_conversation_owner
+from .models import Conversation
+
+
+@receiver(post_save, sender=Conversation)
+@receiver(post_delete, sender=Conversation)
+def _invalidate_owner_cache(sender, instance, **kwargs):
+    forget_conversation_owner(instance.pk)
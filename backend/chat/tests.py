@@ -1,3 +1,133 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from config.ws_auth import JWTAuthMiddleware
+
+from .models import Conversation, Message
+from .serializers import GenerateParamsSerializer
+
+User = get_user_model()
+
+
+class WebsocketAuthTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="learner", email="learner@example.com", password="Sturdy-pass-987")
+
+    def _handshake_user(self, token: str):
+        captured = {}
+
+        async def inner(scope, receive, send):
+            captured["user"] = scope.get("user")
+
+        middleware = JWTAuthMiddleware(inner)
+        async_to_sync(middleware)({"type": "websocket", "query_string": f"token={token}".encode()}, None, None)
+        return captured["user"]
+
+    def test_valid_token_resolves_the_user(self):
+        user = self._handshake_user(str(AccessToken.for_user(self.user)))
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_deactivated_user_is_rejected(self):
+        token = str(AccessToken.for_user(self.user))
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertFalse(self._handshake_user(token).is_authenticated)
+
+    def test_deleted_user_is_rejected(self):
+        token = str(AccessToken.for_user(self.user))
+        self.user.delete()
+        self.assertFalse(self._handshake_user(token).is_authenticated)
+
+    def test_invalid_token_is_anonymous(self):
+        self.assertFalse(self._handshake_user("not-a-token").is_authenticated)
+
+
+@override_settings(USE_OPENAI=False)
+class GenerateTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="learner", email="learner@example.com", password="Sturdy-pass-987")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.convo = Conversation.objects.create(owner=self.user, title="Chat")
+        self.url = f"/api/chat/conversations/{self.convo.id}/generate/"
+
+    def test_stream_without_worker_is_answered_inline(self):
+        with mock.patch("chat.views.get_channel_layer") as layer:
+            response = self.client.post(self.url, {"content": "hello", "stream": True}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["assistant"]["role"], "assistant")
+        layer.assert_not_called()
+        self.assertEqual(self.convo.messages.count(), 2)
+
+    def test_user_message_is_kept_when_the_provider_fails(self):
+        with mock.patch("ai_models.services.EchoModel.chat", side_effect=RuntimeError("provider down")):
+            with self.assertRaises(RuntimeError):
+                self.client.post(self.url, {"content": "hello"}, format="json")
+        self.assertEqual(list(self.convo.messages.values_list("role", "content")), [("user", "hello")])
+
+    def test_invalid_model_is_rejected_before_saving(self):
+        for model in ({"x": 1}, ["gpt"]):
+            response = self.client.post(self.url, {"content": "hello", "model": model}, format="json")
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.convo.messages.exists())
+
+    @override_settings(CHAT_GENERATE_WORKER=True)
+    def test_stream_with_worker_is_queued(self):
+        layer = mock.Mock(send=mock.AsyncMock())
+        with mock.patch("chat.views.get_channel_layer", return_value=layer):
+            response = self.client.post(self.url, {"content": "hello", "stream": True}, format="json")
+        self.assertEqual(response.status_code, 202)
+        channel, event = layer.send.await_args.args
+        self.assertEqual((channel, event["request_id"]), ("chat-generate", response.data["request_id"]))
+        self.assertEqual(self.convo.messages.count(), 1)
+
+
+class GenerateParamsTests(TestCase):
+    def _params(self, data):
+        serializer = GenerateParamsSerializer(data=data)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        return serializer.validated_data
+
+    def test_defaults(self):
+        params = self._params({})
+        self.assertEqual((params["model"], params["temperature"], params["top_p"], params["max_tokens"]), (None, 0.7, 1.0, 512))
+
+    def test_out_of_range_values_are_clamped(self):
+        params = self._params({"temperature": 3, "top_p": -1, "max_tokens": 99999})
+        self.assertEqual((params["temperature"], params["top_p"], params["max_tokens"]), (1.0, 0.0, 2048))
+
+    def test_unparsable_values_fall_back_to_defaults(self):
+        params = self._params({"temperature": "hot", "top_p": None, "max_tokens": "many"})
+        self.assertEqual((params["temperature"], params["top_p"], params["max_tokens"]), (0.7, 1.0, 512))
+
+
+class ConversationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="learner", email="learner@example.com", password="Sturdy-pass-987")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.convo = Conversation.objects.create(owner=self.user, title="Chat")
+        Message.objects.create(conversation=self.convo, role="user", content="hi")
+        Message.objects.create(conversation=self.convo, role="assistant", content="hello")
+
+    def test_list_omits_messages(self):
+        response = self.client.get("/api/chat/conversations/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("messages", response.data[0])
+
+    def test_retrieve_and_messages_return_history_in_order(self):
+        retrieved = self.client.get(f"/api/chat/conversations/{self.convo.id}/")
+        listed = self.client.get(f"/api/chat/conversations/{self.convo.id}/messages/")
+        for data in (retrieved.data["messages"], listed.data):
+            self.assertEqual([m["content"] for m in data], ["hi", "hello"])
+
+    def test_other_users_cannot_read_messages(self):
+        other = User.objects.create_user(username="other", email="other@example.com", password="Sturdy-pass-987")
+        self.client.force_authenticate(other)
+        message = self.convo.messages.first()
+        self.assertEqual(self.client.get(f"/api/chat/messages/{message.id}/").status_code, 404)
+        self.assertEqual(self.client.get(f"/api/chat/conversations/{self.convo.id}/").status_code, 404)
@@ -1,11 +1,23 @@
+import uuid
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 
 from .models import Conversation, Message
-from .serializers import ConversationSerializer, MessageSerializer
-from ai_models.services import EchoModel, OpenAIModel, ChatMessage
+from .serializers import (
+	MESSAGE_LIST_SERIALIZER,
+	ConversationListSerializer,
+	ConversationSerializer,
+	GenerateParamsSerializer,
+	MessageReadSerializer,
+	MessageWriteSerializer,
+)
+from .workers import GENERATE_CHANNEL
+from ai_models.services import EchoModel, OpenAIModel, ChatMessage, get_model
 from django.conf import settings
 
 
@@ -23,7 +35,24 @@ class ConversationViewSet(viewsets.ModelViewSet):
 	permission_classes = [permissions.IsAuthenticated, IsOwner]
 
 	def get_queryset(self):
-		return Conversation.objects.filter(owner=self.request.user)
+		qs = Conversation.objects.filter(owner=self.request.user)
+		if self.action == 'list':
+			return qs.only('id', 'owner_id', 'title', 'created_at', 'updated_at')
+		if self.action == 'retrieve':
+			# One query for all messages instead of one per serialized conversation
+			return qs.prefetch_related('messages')
+		return qs
+
+	def get_object(self):
+		# Views are per-request; memoise so repeated calls don't re-query
+		if not hasattr(self, '_cached_object'):
+			self._cached_object = super().get_object()
+		return self._cached_object
+
+	def get_serializer_class(self):
+		if self.action == 'list':
+			return ConversationListSerializer
+		return ConversationSerializer
 
 	def perform_create(self, serializer):
 		serializer.save(owner=self.request.user)
@@ -33,69 +62,77 @@ class ConversationViewSet(viewsets.ModelViewSet):
 		convo = self.get_object()
 		if request.method.lower() == 'get':
 			qs = convo.messages.all()
-			return Response(MessageSerializer(qs, many=True).data)
+			return Response(MESSAGE_LIST_SERIALIZER.to_representation(qs))
 		# POST: create a message in this conversation (no generation yet)
-		data = request.data.copy()
-		serializer = MessageSerializer(data=data)
+		serializer = MessageWriteSerializer(data=request.data)
 		serializer.is_valid(raise_exception=True)
-		serializer.save(conversation=convo)
-		return Response(serializer.data, status=status.HTTP_201_CREATED)
+		msg = serializer.save(conversation=convo)
+		return Response(MessageReadSerializer(msg).data, status=status.HTTP_201_CREATED)
 
 	@action(detail=True, methods=['post'])
 	def generate(self, request, pk=None):
-		"""Append a user message and generate assistant reply via provider."""
+		"""Append a user message and generate assistant reply via provider.
+
+		With `stream: true` and CHAT_GENERATE_WORKER enabled, the user message is
+		saved and the reply is handed to the chat-generate worker, which streams it
+		to the conversation's websocket group; the response is 202 with the user
+		message and `request_id`. Without a worker the reply is generated inline.
+		"""
 		convo = self.get_object()
 		data = request.data or {}
 		text = data.get('content', '')
 		if not text.strip():
 			return Response({'detail': 'content is required'}, status=400)
-		# Create the user message
+		params = GenerateParamsSerializer(data=data)
+		params.is_valid(raise_exception=True)
+		model = params.validated_data['model'] or None
+		temperature = params.validated_data['temperature']
+		top_p = params.validated_data['top_p']
+		max_tokens = params.validated_data['max_tokens']
+		# Save the user turn first so it is kept even if the provider call fails
 		user_msg = Message.objects.create(conversation=convo, role='user', content=text)
-		# Build history and call provider
-		history = [ChatMessage(role=m.role, content=m.content) for m in convo.messages.all()]
-		# Parameters with safe defaults and bounds
-		model = data.get('model') or None
-		try:
-			temperature = float(data.get('temperature', 0.7))
-		except Exception:
-			temperature = 0.7
-		try:
-			top_p = float(data.get('top_p', 1.0))
-		except Exception:
-			top_p = 1.0
-		try:
-			max_tokens = int(data.get('max_tokens', 512))
-		except Exception:
-			max_tokens = 512
-		# Clamp to safe ranges
-		temperature = max(0.0, min(1.0, temperature))
-		top_p = max(0.0, min(1.0, top_p))
-		max_tokens = max(1, min(2048, max_tokens))
+		rows = convo.messages.values_list('role', 'content')
+		history = [ChatMessage(role=r, content=c) for r, c in rows]
 		# Decide provider
 		force = (request.query_params.get('provider') or '').lower().strip()
 		want_openai = force == 'openai' or getattr(settings, 'USE_OPENAI', False)
 		provider_used = 'echo'
 		if want_openai:
 			try:
-				provider = OpenAIModel()
+				provider = get_model(OpenAIModel)
 				provider_used = 'openai'
 			except Exception as e:
 				# Make the failure visible instead of silently echoing
 				return Response({'detail': 'OpenAI provider not available', 'error': str(e)}, status=502)
 		else:
-			provider = EchoModel()
+			provider = get_model(EchoModel)
+		if data.get('stream') and settings.CHAT_GENERATE_WORKER:
+			request_id = str(data.get('request_id') or uuid.uuid4())
+			async_to_sync(get_channel_layer().send)(GENERATE_CHANNEL, {
+				'type': 'chat.generate',
+				'conversation_id': convo.id,
+				'request_id': request_id,
+				'provider': provider_used,
+				'params': {'model': model, 'temperature': temperature, 'top_p': top_p, 'max_tokens': max_tokens},
+			})
+			return Response({
+				'user': MessageReadSerializer(user_msg).data,
+				'request_id': request_id,
+				'provider_used': provider_used,
+			}, status=status.HTTP_202_ACCEPTED)
 		reply = provider.chat(history, model=model, temperature=temperature, top_p=top_p, max_tokens=max_tokens)
 		asst_msg = Message.objects.create(conversation=convo, role='assistant', content=reply.content)
 		return Response({
-			'user': MessageSerializer(user_msg).data,
-			'assistant': MessageSerializer(asst_msg).data,
+			'user': MessageReadSerializer(user_msg).data,
+			'assistant': MessageReadSerializer(asst_msg).data,
 			'provider_used': provider_used,
 		}, status=201)
 
 
 class MessageViewSet(viewsets.ReadOnlyModelViewSet):
-	serializer_class = MessageSerializer
+	serializer_class = MessageReadSerializer
 	permission_classes = [permissions.IsAuthenticated, IsOwner]
 
 	def get_queryset(self):
-		return Message.objects.filter(conversation__owner=self.request.user)
+		# IsOwner reads obj.conversation.owner_id; join it instead of a lazy fetch
+		return Message.objects.filter(conversation__owner=self.request.user).select_related('conversation')
@@ -0,0 +1,64 @@
+import asyncio
+
+from channels.consumer import AsyncConsumer
+from channels.db import database_sync_to_async
+
+from ai_models.services import AsyncOpenAIModel, ChatMessage, EchoModel, get_model
+from .consumers import DELTA_FLUSH_INTERVAL
+from .models import Message
+
+# Channel name the `generate` endpoint hands streamed replies to; served by
+# `python manage.py runworker chat-generate` (see config/asgi.py)
+GENERATE_CHANNEL = 'chat-generate'
+
+_PROVIDERS = {'openai': AsyncOpenAIModel, 'echo': EchoModel}
+
+
+class GenerateWorker(AsyncConsumer):
+    """Background generation for `generate` requests sent with `stream: true`.
+
+    Each job is delivered to exactly one worker, which streams the provider
+    reply to every socket in the conversation group as message_start / delta /
+    message_end events and then stores the assistant message.
+    """
+
+    async def chat_generate(self, event):
+        convo_id = event['conversation_id']
+        group = f"chat_{convo_id}"
+        req_id = event.get('request_id')
+
+        async def emit(payload):
+            payload['request_id'] = req_id
+            await self.channel_layer.group_send(group, {'type': 'chat.message', 'payload': payload})
+
+        await emit({'type': 'message_start', 'role': 'assistant'})
+        parts, buf = [], []
+        loop = asyncio.get_running_loop()
+        last_flush = loop.time()
+        try:
+            ai = get_model(_PROVIDERS[event['provider']])
+            history = await self._load_history(convo_id)
+            async for delta in ai.achat_stream(history, **event['params']):
+                parts.append(delta)
+                buf.append(delta)
+                # One group_send per flush interval rather than per token
+                if loop.time() - last_flush >= DELTA_FLUSH_INTERVAL:
+                    await emit({'type': 'delta', 'content': ''.join(buf)})
+                    buf.clear()
+                    last_flush = loop.time()
+        except Exception as e:
+            await emit({'type': 'error', 'detail': str(e)})
+            return
+        if buf:
+            await emit({'type': 'delta', 'content': ''.join(buf)})
+        msg_id = await self._save_reply(convo_id, ''.join(parts).strip())
+        await emit({'type': 'message_end', 'message_id': msg_id})
+
+    @database_sync_to_async
+    def _load_history(self, convo_id):
+        rows = Message.objects.filter(conversation_id=convo_id).values_list('role', 'content')
+        return [ChatMessage(role=r, content=c) for r, c in rows]
+
+    @database_sync_to_async
+    def _save_reply(self, convo_id, content):
+        return Message.objects.create(conversation_id=convo_id, role='assistant', content=content).id
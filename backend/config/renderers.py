@@ -0,0 +1,19 @@
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(BaseRenderer):
+    """JSON renderer backed by orjson; falls back to DRF's encoder for types
+    orjson does not know (Decimal, lazy translation strings, ...)."""
+
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    _fallback = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return orjson.dumps(data, default=self._fallback, option=orjson.OPT_NON_STR_KEYS)
@@ -8,11 +8,13 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 # Load environment variables from project root and backend dirs if present
 # Supports: .env at repo root, backend.env at repo root, and backend/.env
-load_dotenv(BASE_DIR.parent / '.env')
-load_dotenv(BASE_DIR.parent / 'backend.env')
-load_dotenv(BASE_DIR / '.env')
+for _env_file in (BASE_DIR.parent / '.env', BASE_DIR.parent / 'backend.env', BASE_DIR / '.env'):
+    if _env_file.is_file():
+        load_dotenv(_env_file)
 
 SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', 'dev-secret-key')
+# Key for hashing invite/password-reset codes at rest
+INVITE_HMAC_KEY = os.environ.get('INVITE_HMAC_KEY', SECRET_KEY)
 
 # Allow configuration via environment, default to dev wildcard
 
@@ -36,6 +38,14 @@ ALLOWED_HOSTS = get_env_list('DJANGO_ALLOWED_HOSTS', '*')
 # Feature flags / providers
 USE_OPENAI = True#get_env_bool('USE_OPENAI', False)
 
+# LLM response cache: "memory" (per-process LRU), "redis", or "none"
+LLM_CACHE = os.environ.get('LLM_CACHE', 'memory')
+LLM_CACHE_TTL = int(os.environ.get('LLM_CACHE_TTL', '3600'))
+LLM_CACHE_MAXSIZE = int(os.environ.get('LLM_CACHE_MAXSIZE', '1024'))
+# Replies sampled at or below this temperature are cached without a cache_seed
+LLM_CACHE_MAX_TEMPERATURE = float(os.environ.get('LLM_CACHE_MAX_TEMPERATURE', '0.3'))
+LLM_CACHE_REDIS_URL = os.environ.get('LLM_CACHE_REDIS_URL') or os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/1')
+
 INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
@@ -98,7 +108,15 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
-    'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.coreapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': (
+        'config.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'config.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 # Allow unauthenticated access to SimpleJWT token views explicitly
@@ -106,6 +124,8 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=int(os.environ.get('JWT_ACCESS_MINUTES', '60'))),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=int(os.environ.get('JWT_REFRESH_DAYS', '7'))),
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'ALGORITHM': 'HS256',
+    'SIGNING_KEY': SECRET_KEY,
 }
 
 # Database
@@ -141,28 +161,49 @@ elif DEV:
 _redis_url = os.environ.get('REDIS_URL')
 _redis_host = os.environ.get('REDIS_HOST', '127.0.0.1')
 _redis_port = int(os.environ.get('REDIS_PORT', '6379'))
-_redis_password = os.environ.get('REDIS_PASSWORD', 'Sfk2y2rcz3axazddgk69qxqipuz8m7taix7xdcu7ntluzkzb8u')
+_redis_password = os.environ.get('REDIS_PASSWORD', '')
 _redis_ssl = get_env_bool('REDIS_SSL', False)
 
+_redis_max_connections = int(os.environ.get('REDIS_MAX_CONNECTIONS', '64'))
+
+# channels_redis builds one connection pool per host dict; passing the address
+# as a URL lets us size that pool alongside the credentials.
 if _redis_url:
-    _hosts = [_redis_url]
-elif _redis_password or _redis_ssl:
+    _hosts = [{'address': _redis_url, 'max_connections': _redis_max_connections}]
+else:
     _hosts = [{
-        'address': (_redis_host, _redis_port),
+        'address': f"{'rediss' if _redis_ssl else 'redis'}://{_redis_host}:{_redis_port}",
         **({'password': _redis_password} if _redis_password else {}),
-        **({'ssl': True} if _redis_ssl else {}),
+        'max_connections': _redis_max_connections,
     }]
-else:
-    _hosts = [(_redis_host, _redis_port)]
 
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels_redis.core.RedisChannelLayer',
-        'CONFIG': {
-            'hosts': _hosts,
+# 'core' queues messages in Redis lists; 'pubsub' uses Redis pub/sub, which is
+# cheaper for group broadcasts but drops messages nobody is subscribed to
+# (e.g. chat-generate jobs while no worker is running).
+_channel_layer_backend = os.environ.get('CHANNEL_LAYER_BACKEND', 'core')
+if _channel_layer_backend == 'pubsub':
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+            'CONFIG': {'hosts': _hosts},
         },
-    },
-}
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': _hosts,
+                'capacity': int(os.environ.get('CHANNEL_LAYER_CAPACITY', '2000')),
+                'expiry': 30,
+            },
+        },
+    }
+
+# Hand `stream: true` generate requests to `python manage.py runworker chat-generate`.
+# Only enable this where that worker is deployed; otherwise, and always on the pubsub
+# layer (which cannot queue jobs for a worker), generate replies inline.
+CHAT_GENERATE_WORKER = get_env_bool('CHAT_GENERATE_WORKER', False) and _channel_layer_backend != 'pubsub'
 
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -185,20 +226,16 @@ MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
 # CORS & CSRF settings for React frontend integration
-_DEFAULT_CORS_ORIGINS: list[str] = [
+_DEFAULT_CORS_ORIGINS = ','.join((
     'http://localhost:3000',
     'http://127.0.0.1:3000',
     'https://localhost:3000',
     'https://127.0.0.1:3000',
-]
-CORS_ALLOWED_ORIGINS = get_env_list(
-    'DJANGO_CORS_ALLOWED_ORIGINS', ','.join(_DEFAULT_CORS_ORIGINS)
-)
+))
+CORS_ALLOWED_ORIGINS = get_env_list('DJANGO_CORS_ALLOWED_ORIGINS', _DEFAULT_CORS_ORIGINS)
 CORS_ALLOW_CREDENTIALS = True
 
-CSRF_TRUSTED_ORIGINS = get_env_list(
-    'DJANGO_CSRF_TRUSTED_ORIGINS', ','.join(_DEFAULT_CORS_ORIGINS)
-)
+CSRF_TRUSTED_ORIGINS = get_env_list('DJANGO_CSRF_TRUSTED_ORIGINS', _DEFAULT_CORS_ORIGINS)
 
 # Cookie & security settings
 SESSION_COOKIE_SAMESITE = 'Lax'
@@ -1,33 +1,35 @@
-from urllib.parse import parse_qs
+import re
+from urllib.parse import unquote_to_bytes
 
 from asgiref.sync import sync_to_async
 from channels.middleware import BaseMiddleware
 from django.contrib.auth.models import AnonymousUser
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
+_jwt_auth = JWTAuthentication()
+_TOKEN_RE = re.compile(rb'(?:^|&)token=([^&]*)')
 
-def _get_user_from_token(token: str):
+
+async def _get_user_from_token(token: str):
     try:
-        jwt_auth = JWTAuthentication()
-        validated = jwt_auth.get_validated_token(token)
-        return jwt_auth.get_user(validated)
+        # Signature and expiry checks are pure CPU; only the user lookup hits the DB
+        validated = _jwt_auth.get_validated_token(token)
+        # get_user rejects deleted and deactivated accounts, so keep it per handshake
+        return await sync_to_async(_jwt_auth.get_user)(validated)
     except Exception:
         return AnonymousUser()
 
 
 class JWTAuthMiddleware(BaseMiddleware):
     async def __call__(self, scope, receive, send):
-        # Parse token from query string: ?token=...
+        # Pull only the first ?token=... value instead of parsing every parameter
+        match = _TOKEN_RE.search(scope.get('query_string', b''))
         try:
-            query_string = scope.get('query_string', b'').decode()
-            params = parse_qs(query_string)
-            token_list = params.get('token') or []
-            token = token_list[0] if token_list else None
-        except Exception:
+            token = unquote_to_bytes(match.group(1).replace(b'+', b' ')).decode() if match else None
+        except UnicodeDecodeError:
             token = None
         if token:
-            user = await sync_to_async(_get_user_from_token)(token)
-            scope['user'] = user
+            scope['user'] = await _get_user_from_token(token)
         return await super().__call__(scope, receive, send)
 
 
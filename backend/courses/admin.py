@@ -60,12 +60,16 @@ class LessonAdmin(admin.ModelAdmin):
     readonly_fields = ("slug", "created_at", "updated_at")
     inlines = (ContentBlockInline,)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_course_context()
+
 
 @admin.register(LessonProgress)
 class LessonProgressAdmin(admin.ModelAdmin):
     list_display = ("user", "lesson", "is_completed", "completed_at")
     list_filter = ("is_completed", "lesson__module__course")
     search_fields = ("user__username", "lesson__title")
+    list_select_related = ("user", "lesson__module__course")
 
 
 @admin.register(Badge)
@@ -123,3 +127,6 @@ class CoursePromptItemAdmin(admin.ModelAdmin):
     search_fields = ("title", "description", "template__title")
     ordering = ("collection", "order", "id")
     readonly_fields = ("slug", "created_at")
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_course_context()
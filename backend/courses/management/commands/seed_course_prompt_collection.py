@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 
 from authentication.models import User
 from courses.models import Course, CoursePromptCollection, CoursePromptItem, PromptTemplate
@@ -14,6 +15,7 @@ class Command(BaseCommand):
         parser.add_argument("--course", type=str, default="ai-prompt-engineering", help="Course slug to attach collection to")
         parser.add_argument("--force", action="store_true", help="Recreate demo collection")
 
+    @transaction.atomic
     def handle(self, *args, **options):
         creator = None
         c = options.get("creator")
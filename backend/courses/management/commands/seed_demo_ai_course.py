@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
 
 from authentication.models import User
@@ -15,6 +16,7 @@ class Command(BaseCommand):
         parser.add_argument("--publish", action="store_true", help="Mark course and lessons as published")
         parser.add_argument("--force", action="store_true", help="Recreate the course if it already exists")
 
+    @transaction.atomic
     def handle(self, *args, **options):
         creator = None
         creator_arg = options.get("creator")
@@ -1,18 +1,30 @@
 from __future__ import annotations
 
+import os
+
 from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
 
 from authentication.models import User
-from courses.models import PromptTemplateCategory, PromptTemplate
+from courses.models import PromptTemplateCategory, PromptTemplate, _assign_unique_slugs
+from courses.utils import normalize_tags
+
+# Rows per INSERT/UPDATE statement for the bulk writes below
+BATCH_SIZE = int(os.environ.get("PATHFINDER_BULK_CREATE_BATCH_SIZE", "100"))
 
 
 class Command(BaseCommand):
-    help = "Seed demo prompt template categories and templates."
+    help = (
+        "Seed demo prompt template categories and templates. "
+        "Bulk writes are batched by PATHFINDER_BULK_CREATE_BATCH_SIZE (default 100)."
+    )
 
     def add_arguments(self, parser):
         parser.add_argument("--creator", type=str, default=None, help="Username or email for created_by")
         parser.add_argument("--force", action="store_true", help="Recreate demo templates")
 
+    @transaction.atomic
     def handle(self, *args, **options):
         creator = None
         c = options.get("creator")
@@ -24,12 +36,7 @@ class Command(BaseCommand):
             ("Chat", "Conversation helpers and system prompts", None),
             ("Coding", "Developer/coding assistants", None),
         ]
-        cat_objs: dict[str, PromptTemplateCategory] = {}
-        for name, desc, parent in cats:
-            if options.get("force"):
-                PromptTemplateCategory.objects.filter(name=name).delete()
-            obj, _ = PromptTemplateCategory.objects.get_or_create(name=name, defaults={"description": desc})
-            cat_objs[name] = obj
+        cat_names = [name for name, _, _ in cats]
 
         demos = [
             {
@@ -39,7 +46,7 @@ class Command(BaseCommand):
                 "variables": ["style", "length", "input"],
                 "tags": ["summary", "general"],
                 "default_params": {"temperature": 0.3},
-                "category": cat_objs["General"],
+                "category": "General",
             },
             {
                 "title": "System Persona",
@@ -48,7 +55,7 @@ class Command(BaseCommand):
                 "variables": ["role", "objectives", "constraints"],
                 "tags": ["chat", "persona"],
                 "default_params": {"temperature": 0.2},
-                "category": cat_objs["Chat"],
+                "category": "Chat",
             },
             {
                 "title": "Code Reviewer",
@@ -57,21 +64,66 @@ class Command(BaseCommand):
                 "variables": ["language", "code"],
                 "tags": ["coding", "review"],
                 "default_params": {"temperature": 0.1},
-                "category": cat_objs["Coding"],
+                "category": "Coding",
             },
         ]
+        titles = [demo["title"] for demo in demos]
+
+        if options.get("force"):
+            # Templates go first so the category delete has no SET_NULL updates left to run
+            PromptTemplate.objects.filter(title__in=titles).delete()
+            PromptTemplateCategory.objects.filter(name__in=cat_names).delete()
+
+        cat_objs: dict[str, PromptTemplateCategory] = {
+            c.name: c for c in PromptTemplateCategory.objects.filter(name__in=cat_names)
+        }
+        new_cats = []
+        for name, desc, parent in cats:
+            if name not in cat_objs:
+                obj = PromptTemplateCategory(name=name, description=desc)
+                new_cats.append(obj)
+                cat_objs[name] = obj
+        # bulk_create skips save(), so slugs are assigned here
+        _assign_unique_slugs(new_cats, "name", max_length=140)
+        PromptTemplateCategory.objects.bulk_create(new_cats, batch_size=BATCH_SIZE)
+
+        existing: dict[str, PromptTemplate] = {}
+        for t in PromptTemplate.objects.filter(title__in=titles):
+            existing.setdefault(t.title, t)
 
+        to_create: list[PromptTemplate] = []
+        to_update: list[PromptTemplate] = []
+        now = timezone.now()
         for demo in demos:
-            if options.get("force"):
-                PromptTemplate.objects.filter(title=demo["title"]).delete()
-            obj, created = PromptTemplate.objects.get_or_create(title=demo["title"], defaults={**demo, "created_by": creator})
-            if not created:
-                # Update tags/defaults if changed
-                obj.description = obj.description or demo["description"]
-                obj.variables = demo["variables"]
-                obj.tags = demo["tags"]
-                obj.default_params = demo["default_params"]
-                obj.category = demo["category"]
-                obj.save()
+            # bulk writes skip save(), so tags are normalized here
+            demo["tags"] = normalize_tags(demo["tags"])
+            demo["category"] = cat_objs[demo["category"]]
+            obj = existing.get(demo["title"])
+            if obj is None:
+                to_create.append(PromptTemplate(**demo, created_by=creator))
+                continue
+            # Update tags/defaults if changed
+            obj.description = obj.description or demo["description"]
+            obj.variables = demo["variables"]
+            obj.tags = demo["tags"]
+            obj.default_params = demo["default_params"]
+            obj.category = demo["category"]
+            obj.updated_at = now
+            to_update.append(obj)
+        _assign_unique_slugs(to_create, "title")
+        update_fields = ["description", "variables", "tags", "default_params", "category", "updated_at"]
+        if connection.features.supports_update_conflicts_with_target:
+            # Titles aren't unique, so rows are matched above; existing ones keep their pk and
+            # are rewritten by INSERT ... ON CONFLICT (id) DO UPDATE instead of a CASE-per-row UPDATE
+            PromptTemplate.objects.bulk_create(
+                to_create + to_update,
+                update_conflicts=True,
+                unique_fields=["id"],
+                update_fields=update_fields,
+                batch_size=BATCH_SIZE,
+            )
+        else:
+            PromptTemplate.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+            PromptTemplate.objects.bulk_update(to_update, update_fields, batch_size=BATCH_SIZE)
 
         self.stdout.write(self.style.SUCCESS("Seeded demo prompt templates"))
@@ -8,6 +8,8 @@ class Migration(migrations.Migration):
     ]
 
     operations = [
+        # Nullable with no default: Postgres and SQLite both add this with a plain
+        # ALTER TABLE ... ADD COLUMN, a catalog-only change that doesn't rewrite courses_quiz
         migrations.AddField(
             model_name="quiz",
             name="questions_to_show",
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.7 on 2026-10-15 09:42
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_quiz_questions_to_show'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(django.db.models.functions.text.Lower('slug'), name='courses_course_slug_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prompttemplate',
+            index=models.Index(django.db.models.functions.text.Lower('slug'), name='courses_pt_slug_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prompttemplatecategory',
+            index=models.Index(django.db.models.functions.text.Lower('slug'), name='courses_ptcat_slug_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.7 on 2026-10-15 09:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0011_fk_order_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quizanswer',
+            index=models.Index(fields=['question', 'is_correct'], name='courses_qui_questio_453d23_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizsubmission',
+            index=models.Index(fields=['quiz', '-submitted_at'], name='courses_qui_quiz_id_1005c3_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_lesson_course(apps, schema_editor):
+    Lesson = apps.get_model("courses", "Lesson")
+    Module = apps.get_model("courses", "Module")
+    Lesson.objects.update(
+        course_id=Subquery(Module.objects.filter(pk=OuterRef("module_id")).values("course_id")[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0012_quiz_analytics_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="lesson",
+            name="course",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="courses.course",
+            ),
+        ),
+        migrations.RunPython(backfill_lesson_course, migrations.RunPython.noop),
+    ]
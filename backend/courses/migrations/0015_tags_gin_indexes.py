@@ -0,0 +1,43 @@
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+TAG_INDEXES = [
+    ("prompttemplate", "courses_pt_tags_gin"),
+    ("coursepromptcollection", "courses_pcol_tags_gin"),
+]
+
+
+def _gin_index(name):
+    return django.contrib.postgres.indexes.GinIndex(fields=["tags"], name=name)
+
+
+def create_tag_indexes(apps, schema_editor):
+    # GIN is Postgres-only; SQLite dev/test databases keep the index in state only
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for model_name, index_name in TAG_INDEXES:
+        schema_editor.add_index(apps.get_model("courses", model_name), _gin_index(index_name))
+
+
+def drop_tag_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for model_name, index_name in TAG_INDEXES:
+        schema_editor.remove_index(apps.get_model("courses", model_name), _gin_index(index_name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0014_alter_lesson_course"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name=model_name, index=_gin_index(index_name))
+                for model_name, index_name in TAG_INDEXES
+            ],
+            database_operations=[migrations.RunPython(create_tag_indexes, drop_tag_indexes)],
+        ),
+    ]
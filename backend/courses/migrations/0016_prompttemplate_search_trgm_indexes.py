@@ -0,0 +1,53 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.db.models.functions.text
+from django.db import migrations
+
+SEARCH_INDEXES = [
+    ("title", "courses_pt_title_trgm"),
+    ("description", "courses_pt_description_trgm"),
+    ("content", "courses_pt_content_trgm"),
+]
+
+
+def _trgm_index(field_name, name):
+    return django.contrib.postgres.indexes.GinIndex(
+        django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(field_name), name="gin_trgm_ops"),
+        name=name,
+    )
+
+
+def create_search_indexes(apps, schema_editor):
+    # Trigram GIN is Postgres-only; SQLite dev/test databases keep the indexes in state only
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    model = apps.get_model("courses", "prompttemplate")
+    for field_name, index_name in SEARCH_INDEXES:
+        schema_editor.add_index(model, _trgm_index(field_name, index_name))
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    model = apps.get_model("courses", "prompttemplate")
+    for field_name, index_name in SEARCH_INDEXES:
+        schema_editor.remove_index(model, _trgm_index(field_name, index_name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0015_tags_gin_indexes"),
+    ]
+
+    operations = [
+        # No-op outside Postgres
+        django.contrib.postgres.operations.TrigramExtension(),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name="prompttemplate", index=_trgm_index(field_name, index_name))
+                for field_name, index_name in SEARCH_INDEXES
+            ],
+            database_operations=[migrations.RunPython(create_search_indexes, drop_search_indexes)],
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+def backfill_answers_norm(apps, schema_editor):
+    QuizQuestion = apps.get_model("courses", "QuizQuestion")
+    questions = []
+    for question in QuizQuestion.objects.only("id", "data").iterator():
+        data = question.data
+        if isinstance(data, dict) and data.get("case_insensitive", True):
+            question.answers_norm = [str(e).strip().lower() for e in data.get("answers", [])]
+            questions.append(question)
+    QuizQuestion.objects.bulk_update(questions, ["answers_norm"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0016_prompttemplate_search_trgm_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="quizquestion",
+            name="answers_norm",
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_answers_norm, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+def backfill_expected_keywords_norm(apps, schema_editor):
+    Exercise = apps.get_model("courses", "Exercise")
+    exercises = []
+    for exercise in Exercise.objects.only("id", "data").iterator():
+        data = exercise.data
+        if isinstance(data, dict) and data.get("expected_keywords"):
+            exercise.expected_keywords_norm = [str(x).lower() for x in data["expected_keywords"]]
+            exercises.append(exercise)
+    Exercise.objects.bulk_update(exercises, ["expected_keywords_norm"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0017_quizquestion_answers_norm"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exercise",
+            name="expected_keywords_norm",
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(backfill_expected_keywords_norm, migrations.RunPython.noop),
+    ]
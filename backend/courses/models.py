@@ -1,33 +1,118 @@
+import re
+
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Coalesce, Lower, NullIf, Upper
 from django.utils.text import slugify
 
+from .utils import normalize_tags
+
+# Enables `slug__lower=...` filters that can use the Lower("slug") indexes below
+models.SlugField.register_lookup(Lower)
+
+# Characters kept free at the end of a truncated base for a "-N" suffix
+_SLUG_SUFFIX_RESERVE = 11
+# Values already in slugify()'s output form can skip its unicode normalization
+_SLUG_SAFE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+_SLUG_SUFFIX_RE = re.compile(r"-(\d+)")
+
 
-def _generate_unique_slug(instance: models.Model, value: str, *, field_name: str, scope_filter: dict | None = None, max_length: int = 220) -> str:
+def _generate_unique_slug(
+    instance: models.Model,
+    value: str,
+    *,
+    field_name: str,
+    scope_filter: dict | None = None,
+    max_length: int = 220,
+    existing: set[str] | None = None,
+) -> str:
     """Generate a unique slug for the given model instance.
 
     If scope_filter is provided, uniqueness is ensured within that scope (e.g., per course/module).
+    Pass a pre-fetched `existing` set to skip the query; the new slug is added to it so
+    repeated calls in a loop don't collide.
     """
-    base_slug = slugify(value)[:max_length]
+    base_slug = (value if _SLUG_SAFE.fullmatch(value or "") else slugify(value))[:max_length]
     if not base_slug:
         base_slug = "item"
 
-    ModelClass = instance.__class__
-    scope_filter = scope_filter or {}
+    if existing is None:
+        ModelClass = instance.__class__
+        scoped = ModelClass.objects.filter(**(scope_filter or {}))
+        # Common case: the base slug is free, which one indexed equality probe confirms
+        if not scoped.filter(**{field_name: base_slug}).exists():
+            return base_slug
+        # Only slugs sharing the base (leaving room for a "-N" suffix) can collide
+        prefix = base_slug[: max_length - _SLUG_SUFFIX_RESERVE]
+        qs = scoped.filter(**{f"{field_name}__startswith": prefix})
+        existing = set(filter(None, qs.order_by().values_list(field_name, flat=True)))
 
     slug = base_slug
     suffix = 1
-    qs = ModelClass.objects.filter(**scope_filter).values_list(field_name, flat=True)
-    existing = set(filter(None, qs))
-
+    if slug in existing:
+        # Jump past the highest numbered variant instead of probing 2, 3, ... in turn
+        n = len(base_slug)
+        matches = (_SLUG_SUFFIX_RE.fullmatch(s, n) for s in existing if s.startswith(base_slug))
+        suffix = max((int(m.group(1)) for m in matches if m), default=1)
     while slug in existing:
         suffix += 1
         suffix_str = f"-{suffix}"
         slug = (base_slug[: max_length - len(suffix_str)] + suffix_str)
 
+    existing.add(slug)
     return slug
 
 
+class _SlugAllocator:
+    """Hands out unique slugs within one scope, loading the taken slugs with a single query.
+
+    Use it when many rows are slugged in the same scope (bulk inserts, seeding) instead of
+    letting each save() query for collisions.
+    """
+
+    def __init__(
+        self,
+        ModelClass: type[models.Model],
+        *,
+        field_name: str = "slug",
+        scope_filter: dict | None = None,
+        max_length: int = 220,
+    ) -> None:
+        self.field_name = field_name
+        self.max_length = max_length
+        qs = ModelClass.objects.filter(**(scope_filter or {})).order_by().values_list(field_name, flat=True)
+        self.existing: set[str] = set(filter(None, qs))
+
+    def allocate(self, instance: models.Model, value: str) -> str:
+        return _generate_unique_slug(
+            instance, value, field_name=self.field_name, max_length=self.max_length, existing=self.existing
+        )
+
+
+def _assign_unique_slugs(
+    instances: list[models.Model],
+    source_field: str,
+    *,
+    field_name: str = "slug",
+    scope_filter: dict | None = None,
+    max_length: int = 220,
+) -> None:
+    """Give unsaved instances (e.g. for bulk_create) unique slugs with a single query.
+
+    All instances must share the same model and slug scope.
+    """
+    pending = [obj for obj in instances if not getattr(obj, field_name)]
+    if not pending:
+        return
+    allocator = _SlugAllocator(
+        pending[0].__class__, field_name=field_name, scope_filter=scope_filter, max_length=max_length
+    )
+    for obj in pending:
+        setattr(obj, field_name, allocator.allocate(obj, getattr(obj, source_field)))
+
+
 class Course(models.Model):
     """Top-level course container."""
 
@@ -50,6 +135,7 @@ class Course(models.Model):
 
     class Meta:
         ordering = ["title", "-created_at"]
+        indexes = [models.Index(Lower("slug"), name="courses_course_slug_lower_idx")]
 
     def __str__(self) -> str:  # pragma: no cover - simple representation
         return self.title
@@ -60,6 +146,33 @@ class Course(models.Model):
         super().save(*args, **kwargs)
 
 
+def _resync_lesson_course(module_ids) -> None:
+    """Copy each module's course onto its lessons after a write that skipped Module.save()."""
+    Lesson.objects.filter(module_id__in=module_ids).update(
+        course_id=models.Subquery(Module.objects.filter(pk=models.OuterRef("module_id")).values("course_id")[:1])
+    )
+
+
+class ModuleQuerySet(models.QuerySet):
+    def update(self, **kwargs) -> int:
+        if "course" not in kwargs and "course_id" not in kwargs:
+            return super().update(**kwargs)
+        # Capture the pks first: the update may move rows out of this queryset's filter
+        module_ids = list(self.values_list("pk", flat=True))
+        rows = super().update(**kwargs)
+        _resync_lesson_course(module_ids)
+        return rows
+
+    def bulk_update(self, objs, fields, *args, **kwargs) -> int:
+        objs = list(objs)
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        if "course" in fields or "course_id" in fields:
+            _resync_lesson_course([obj.pk for obj in objs])
+            for obj in objs:
+                obj._loaded_course_id = obj.course_id
+        return rows
+
+
 class Module(models.Model):
     """A section within a course, used to group lessons."""
 
@@ -69,26 +182,91 @@ class Module(models.Model):
     slug: str = models.SlugField(max_length=220, blank=True)
     description: str = models.TextField(blank=True)
 
-    order: int = models.PositiveIntegerField(default=0, db_index=True)
+    order: int = models.PositiveIntegerField(default=0)
+
+    objects = ModuleQuerySet.as_manager()
 
     class Meta:
         ordering = ["order", "id"]
+        indexes = [models.Index(fields=["course", "order"])]
         unique_together = ("course", "slug")
 
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.course.title} · {self.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored course so save() only resyncs lessons after a move;
+        # a deferred course leaves this unset, which counts as a move
+        instance._loaded_course_id = instance.__dict__.get("course_id")
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs) -> None:
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None or "course" in fields or "course_id" in fields:
+            self._loaded_course_id = self.course_id
+
     def save(self, *args, **kwargs) -> None:
         if not self.slug:
             scope = {"course": self.course}
             self.slug = _generate_unique_slug(self, self.title, field_name="slug", scope_filter=scope, max_length=220)
+        adding = self._state.adding
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            moved = self.course_id != getattr(self, "_loaded_course_id", None)
+        else:
+            moved = "course" in update_fields or "course_id" in update_fields
         super().save(*args, **kwargs)
+        if not adding and moved:
+            # Keep Lesson.course in step with the module's new course
+            self.lessons.exclude(course_id=self.course_id).update(course_id=self.course_id)
+        if update_fields is None or moved:
+            self._loaded_course_id = self.course_id
+
+
+class LessonQuerySet(models.QuerySet):
+    """Keeps the denormalized Lesson.course in step on writes that skip Lesson.save()."""
+
+    def with_course_context(self) -> "LessonQuerySet":
+        """Join the module and course that __str__ reads, for admin lists and logging."""
+        return self.select_related("module__course")
+
+    @staticmethod
+    def _sync_course(lessons) -> None:
+        course_ids = dict(
+            Module.objects.filter(pk__in={lesson.module_id for lesson in lessons}).values_list("id", "course_id")
+        )
+        for lesson in lessons:
+            lesson.course_id = course_ids.get(lesson.module_id)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        self._sync_course(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs) -> int:
+        if "module" in fields or "module_id" in fields:
+            objs = list(objs)
+            self._sync_course(objs)
+            fields = [*{*fields, "course"}]
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def update(self, **kwargs) -> int:
+        # `module` is a Module or a pk here; the course comes from its current row
+        module = kwargs.get("module", kwargs.get("module_id"))
+        if module is not None and "course" not in kwargs and "course_id" not in kwargs:
+            module_id = module.pk if isinstance(module, Module) else module
+            kwargs["course_id"] = models.Subquery(Module.objects.filter(pk=module_id).values("course_id")[:1])
+        return super().update(**kwargs)
 
 
 class Lesson(models.Model):
     """An individual lesson within a module."""
 
     module = models.ForeignKey(Module, on_delete=models.CASCADE, related_name="lessons")
+    # Denormalized from module.course so course-wide lesson queries skip the module join
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="+", editable=False)
 
     title: str = models.CharField(max_length=200)
     slug: str = models.SlugField(max_length=220, blank=True)
@@ -96,14 +274,17 @@ class Lesson(models.Model):
     content: str = models.TextField(blank=True)
     duration_minutes: int | None = models.PositiveIntegerField(null=True, blank=True)
 
-    order: int = models.PositiveIntegerField(default=0, db_index=True)
+    order: int = models.PositiveIntegerField(default=0)
     is_published: bool = models.BooleanField(default=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = LessonQuerySet.as_manager()
+
     class Meta:
         ordering = ["order", "id"]
+        indexes = [models.Index(fields=["module", "order"])]
         unique_together = ("module", "slug")
 
     def __str__(self) -> str:  # pragma: no cover
@@ -113,10 +294,16 @@ class Lesson(models.Model):
         if not self.slug:
             scope = {"module": self.module}
             self.slug = _generate_unique_slug(self, self.title, field_name="slug", scope_filter=scope, max_length=220)
+        self.course_id = self.module.course_id
         super().save(*args, **kwargs)
 
 
 # Content blocks (3.2)
+class ContentBlockQuerySet(models.QuerySet):
+    def with_course_context(self) -> "ContentBlockQuerySet":
+        return self.select_related("lesson__module__course")
+
+
 class ContentBlock(models.Model):
     """Typed content block associated with a Lesson.
 
@@ -148,14 +335,17 @@ class ContentBlock(models.Model):
     title: str = models.CharField(max_length=200, blank=True)
     data: dict = models.JSONField(default=dict, blank=True)
 
-    order: int = models.PositiveIntegerField(default=0, db_index=True)
+    order: int = models.PositiveIntegerField(default=0)
     is_published: bool = models.BooleanField(default=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ContentBlockQuerySet.as_manager()
+
     class Meta:
         ordering = ["order", "id"]
+        indexes = [models.Index(fields=["lesson", "order"])]
 
     def __str__(self) -> str:  # pragma: no cover
         label = self.title or self.block_type
@@ -223,7 +413,7 @@ class Quiz(models.Model):
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name="quizzes")
     title: str = models.CharField(max_length=200)
     description: str = models.TextField(blank=True)
-    order: int = models.PositiveIntegerField(default=0, db_index=True)
+    order: int = models.PositiveIntegerField(default=0)
     is_published: bool = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -259,6 +449,7 @@ class Quiz(models.Model):
 
     class Meta:
         ordering = ["order", "id"]
+        indexes = [models.Index(fields=["lesson", "order"])]
 
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.lesson} · {self.title}"
@@ -277,17 +468,38 @@ class QuizQuestion(models.Model):
     text: str = models.TextField()
     question_type: str = models.CharField(max_length=10, choices=QUESTION_TYPE_CHOICES, default=TYPE_MCQ)
     data: dict = models.JSONField(default=dict, blank=True)  # e.g., {"answers": ["..."], "case_insensitive": true}
-    order: int = models.PositiveIntegerField(default=0, db_index=True)
+    order: int = models.PositiveIntegerField(default=0)
     points: int = models.PositiveIntegerField(default=1, help_text="Points awarded for correct answer")
     is_required: bool = models.BooleanField(default=True, help_text="Whether this question must be answered")
     explanation: str = models.TextField(blank=True, help_text="Explanation shown after answering (optional)")
+    # Stripped, lowercased data["answers"] for grading; null when the question is case-sensitive
+    answers_norm: list | None = models.JSONField(null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ["order", "id"]
+        indexes = [models.Index(fields=["quiz", "order"])]
 
     def __str__(self) -> str:  # pragma: no cover
         return f"Q{self.pk} {self.text[:40]}..."
 
+    def normalize_answers(self) -> None:
+        """Mirror data["answers"] into answers_norm, stripped and lowercased.
+
+        Grading reads the mirror so no submission re-normalizes the expected answers.
+        """
+        data = self.data if isinstance(self.data, dict) else {}
+        if data.get("case_insensitive", True):
+            self.answers_norm = [str(e).strip().lower() for e in data.get("answers", [])]
+        else:
+            self.answers_norm = None
+
+    def save(self, *args, **kwargs):
+        self.normalize_answers()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "data" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "answers_norm"}
+        super().save(*args, **kwargs)
+
 
 class QuizChoice(models.Model):
     question = models.ForeignKey(QuizQuestion, on_delete=models.CASCADE, related_name="choices")
@@ -311,7 +523,31 @@ class QuizSubmission(models.Model):
 
     class Meta:
         ordering = ["-submitted_at", "id"]
-        indexes = [models.Index(fields=["user", "quiz"])]
+        indexes = [
+            models.Index(fields=["user", "quiz"]),
+            models.Index(fields=["quiz", "-submitted_at"]),
+        ]
+
+    @classmethod
+    def recalculate_scores(cls, submission_ids) -> None:
+        """Re-grade submissions from their stored answers with one aggregate query.
+
+        Matches QuizSubmissionSerializer.create: one point per correct answer, and
+        max_score falls back to 1.0 when a submission has no answers.
+        """
+        totals = {
+            row["submission_id"]: row
+            for row in QuizAnswer.objects.filter(submission_id__in=submission_ids)
+            .order_by()
+            .values("submission_id")
+            .annotate(correct=models.Count("id", filter=models.Q(is_correct=True)), answered=models.Count("id"))
+        }
+        submissions = list(cls.objects.filter(id__in=submission_ids).only("id", "score", "max_score"))
+        for submission in submissions:
+            row = totals.get(submission.id)
+            submission.score = float(row["correct"]) if row else 0.0
+            submission.max_score = float(row["answered"]) if row else 1.0
+        cls.objects.bulk_update(submissions, ["score", "max_score"], batch_size=500)
 
 
 class QuizAnswer(models.Model):
@@ -323,6 +559,7 @@ class QuizAnswer(models.Model):
 
     class Meta:
         unique_together = ("submission", "question")
+        indexes = [models.Index(fields=["question", "is_correct"])]
 
 
 class Exercise(models.Model):
@@ -333,6 +570,8 @@ class Exercise(models.Model):
     order: int = models.PositiveIntegerField(default=0, db_index=True)
     is_published: bool = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Lowercased data["expected_keywords"] for auto-evaluation
+    expected_keywords_norm: list = models.JSONField(default=list, blank=True, editable=False)
 
     class Meta:
         ordering = ["order", "id"]
@@ -340,6 +579,21 @@ class Exercise(models.Model):
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.lesson} · {self.title}"
 
+    def normalize_keywords(self) -> None:
+        """Mirror data["expected_keywords"] into expected_keywords_norm, lowercased.
+
+        Auto-evaluation reads the mirror so no submission re-lowercases the keywords.
+        """
+        data = self.data if isinstance(self.data, dict) else {}
+        self.expected_keywords_norm = [str(x).lower() for x in data.get("expected_keywords", [])]
+
+    def save(self, *args, **kwargs):
+        self.normalize_keywords()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "data" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "expected_keywords_norm"}
+        super().save(*args, **kwargs)
+
 
 class ExerciseSubmission(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="exercise_submissions")
@@ -367,6 +621,7 @@ class PromptTemplateCategory(models.Model):
 
     class Meta:
         ordering = ["name", "slug"]
+        indexes = [models.Index(Lower("slug"), name="courses_ptcat_slug_lower_idx")]
 
     def __str__(self) -> str:  # pragma: no cover
         return self.name
@@ -396,6 +651,16 @@ class PromptTemplate(models.Model):
 
     class Meta:
         ordering = ["title", "slug"]
+        indexes = [
+            models.Index(Lower("slug"), name="courses_pt_slug_lower_idx"),
+            # Serves tags__contains; created on Postgres only, see migration 0015
+            GinIndex(fields=["tags"], name="courses_pt_tags_gin"),
+            # Trigram indexes on UPPER(col), the expression icontains compiles to, so the
+            # q search can use them; Postgres only, see migration 0016
+            GinIndex(OpClass(Upper("title"), name="gin_trgm_ops"), name="courses_pt_title_trgm"),
+            GinIndex(OpClass(Upper("description"), name="gin_trgm_ops"), name="courses_pt_description_trgm"),
+            GinIndex(OpClass(Upper("content"), name="gin_trgm_ops"), name="courses_pt_content_trgm"),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover
         return self.title
@@ -405,14 +670,7 @@ class PromptTemplate(models.Model):
             self.slug = _generate_unique_slug(self, self.title, field_name="slug", max_length=220)
         # Normalize tags to lowercase unique
         if isinstance(self.tags, list):
-            seen = set()
-            norm = []
-            for t in self.tags:
-                s = str(t).strip().lower()
-                if s and s not in seen:
-                    seen.add(s)
-                    norm.append(s)
-            self.tags = norm
+            self.tags = normalize_tags(self.tags)
         super().save(*args, **kwargs)
 
 
@@ -435,6 +693,7 @@ class CoursePromptCollection(models.Model):
     class Meta:
         ordering = ["course_id", "order", "title", "id"]
         unique_together = ("course", "slug")
+        indexes = [GinIndex(fields=["tags"], name="courses_pcol_tags_gin")]
 
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.course.title} · {self.title}"
@@ -445,17 +704,24 @@ class CoursePromptCollection(models.Model):
             self.slug = _generate_unique_slug(self, self.title, field_name="slug", scope_filter=scope, max_length=220)
         # Normalize tags
         if isinstance(self.tags, list):
-            seen = set()
-            norm = []
-            for t in self.tags:
-                s = str(t).strip().lower()
-                if s and s not in seen:
-                    seen.add(s)
-                    norm.append(s)
-            self.tags = norm
+            self.tags = normalize_tags(self.tags)
         super().save(*args, **kwargs)
 
 
+class CoursePromptItemQuerySet(models.QuerySet):
+    def with_display_title(self) -> "CoursePromptItemQuerySet":
+        """Resolve the display title in SQL so rendering a list needs no per-row template fetch."""
+        return self.annotate(display_title_db=Coalesce(NullIf("title", Value("")), "template__title"))
+
+    def with_course_context(self) -> "CoursePromptItemQuerySet":
+        return self.select_related("collection__course")
+
+
+class CoursePromptItemManager(models.Manager.from_queryset(CoursePromptItemQuerySet)):
+    def get_queryset(self) -> CoursePromptItemQuerySet:
+        return super().get_queryset().select_related("template", "collection")
+
+
 class CoursePromptItem(models.Model):
     collection = models.ForeignKey(CoursePromptCollection, on_delete=models.CASCADE, related_name="items")
     template = models.ForeignKey(PromptTemplate, on_delete=models.CASCADE, related_name="course_items")
@@ -469,10 +735,12 @@ class CoursePromptItem(models.Model):
     params_override: dict = models.JSONField(default=dict, blank=True)
     tags_override: list[str] = models.JSONField(default=list, blank=True)
 
-    order: int = models.PositiveIntegerField(default=0, db_index=True)
+    order: int = models.PositiveIntegerField(default=0)
     is_active: bool = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = CoursePromptItemManager()
+
     class Meta:
         ordering = ["collection_id", "order", "id"]
         unique_together = ("collection", "slug")
@@ -483,6 +751,10 @@ class CoursePromptItem(models.Model):
 
     @property
     def display_title(self) -> str:
+        # Prefer the with_display_title() annotation when the queryset provided it
+        annotated = getattr(self, "display_title_db", None)
+        if annotated is not None:
+            return annotated
         return self.title or self.template.title
 
     def save(self, *args, **kwargs) -> None:
@@ -493,12 +765,5 @@ class CoursePromptItem(models.Model):
             self.slug = _generate_unique_slug(self, base, field_name="slug", scope_filter=scope, max_length=220)
         # Normalize tag overrides
         if isinstance(self.tags_override, list):
-            seen = set()
-            norm = []
-            for t in self.tags_override:
-                s = str(t).strip().lower()
-                if s and s not in seen:
-                    seen.add(s)
-                    norm.append(s)
-            self.tags_override = norm
+            self.tags_override = normalize_tags(self.tags_override)
         super().save(*args, **kwargs)
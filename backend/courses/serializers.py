@@ -1,5 +1,6 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
-import re
+import copy
 
 from .models import (
     Course,
@@ -20,12 +21,30 @@ from .models import (
     PromptTemplate,
     CoursePromptCollection,
     CoursePromptItem,
+    _SlugAllocator,
 )
+from .utils import normalize_tags, template_variables
 
-VAR_PATTERN = re.compile(r"\{([a-zA-Z_][a-zA-Z0-9_]*)\}")
 
+class CachedFieldsSerializer(serializers.ModelSerializer):
+    """ModelSerializer that introspects its model fields once per class.
 
-class CourseSerializer(serializers.ModelSerializer):
+    DRF rebuilds every field from model meta on each instantiation, including each
+    nested child serializer. Deep-copying a cached set is cheaper, and still gives
+    every serializer its own unbound field instances.
+    """
+
+    _fields_cache: dict[type, dict] = {}
+
+    def get_fields(self):
+        cls = type(self)
+        fields = CachedFieldsSerializer._fields_cache.get(cls)
+        if fields is None:
+            fields = CachedFieldsSerializer._fields_cache[cls] = super().get_fields()
+        return copy.deepcopy(fields)
+
+
+class CourseSerializer(CachedFieldsSerializer):
     created_by = serializers.PrimaryKeyRelatedField(read_only=True)
     slug = serializers.ReadOnlyField()
 
@@ -50,9 +69,9 @@ class CourseSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class ModuleSerializer(serializers.ModelSerializer):
+class ModuleSerializer(CachedFieldsSerializer):
     slug = serializers.ReadOnlyField()
-    course_title = serializers.SerializerMethodField()
+    course_title = serializers.CharField(source="course.title", read_only=True)
 
     class Meta:
         model = Module
@@ -67,15 +86,16 @@ class ModuleSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ("slug",)
 
-    def get_course_title(self, obj):
-        return obj.course.title if obj.course else None
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.select_related("course")
 
 
-class LessonSerializer(serializers.ModelSerializer):
+class LessonSerializer(CachedFieldsSerializer):
     slug = serializers.ReadOnlyField()
-    course = serializers.SerializerMethodField()
-    course_title = serializers.SerializerMethodField()
-    module_title = serializers.SerializerMethodField()
+    course = serializers.PrimaryKeyRelatedField(read_only=True)
+    course_title = serializers.CharField(source="module.course.title", read_only=True)
+    module_title = serializers.CharField(source="module.title", read_only=True)
 
     class Meta:
         model = Lesson
@@ -96,17 +116,12 @@ class LessonSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ("slug", "created_at", "updated_at")
 
-    def get_course(self, obj):
-        return obj.module.course.id if obj.module and obj.module.course else None
-
-    def get_course_title(self, obj):
-        return obj.module.course.title if obj.module and obj.module.course else None
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.select_related("module__course")
 
-    def get_module_title(self, obj):
-        return obj.module.title if obj.module else None
 
-
-class ContentBlockSerializer(serializers.ModelSerializer):
+class ContentBlockSerializer(CachedFieldsSerializer):
     class Meta:
         model = ContentBlock
         fields = [
@@ -123,7 +138,7 @@ class ContentBlockSerializer(serializers.ModelSerializer):
         read_only_fields = ("created_at", "updated_at")
 
 
-class LessonProgressSerializer(serializers.ModelSerializer):
+class LessonProgressSerializer(CachedFieldsSerializer):
     class Meta:
         model = LessonProgress
         fields = [
@@ -136,7 +151,7 @@ class LessonProgressSerializer(serializers.ModelSerializer):
         read_only_fields = ("user",)
 
 
-class BadgeSerializer(serializers.ModelSerializer):
+class BadgeSerializer(CachedFieldsSerializer):
     class Meta:
         model = Badge
         fields = [
@@ -152,9 +167,9 @@ class BadgeSerializer(serializers.ModelSerializer):
         ]
 
 
-class UserBadgeSerializer(serializers.ModelSerializer):
+class UserBadgeSerializer(CachedFieldsSerializer):
     badge = BadgeSerializer(read_only=True)
-    badge_id = serializers.PrimaryKeyRelatedField(queryset=Badge.objects.all(), source="badge", write_only=True)
+    badge_id = serializers.PrimaryKeyRelatedField(queryset=Badge.objects, source="badge", write_only=True)
 
     class Meta:
         model = UserBadge
@@ -168,13 +183,13 @@ class UserBadgeSerializer(serializers.ModelSerializer):
         read_only_fields = ("user", "badge", "awarded_at")
 
 
-class QuizChoiceSerializer(serializers.ModelSerializer):
+class QuizChoiceSerializer(CachedFieldsSerializer):
     class Meta:
         model = QuizChoice
         fields = ["id", "text", "is_correct", "order"]
 
 
-class QuizQuestionSerializer(serializers.ModelSerializer):
+class QuizQuestionSerializer(CachedFieldsSerializer):
     choices = QuizChoiceSerializer(many=True, required=False)
 
     class Meta:
@@ -191,17 +206,24 @@ class QuizQuestionSerializer(serializers.ModelSerializer):
             "choices",
         ]
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        # Choices come back in QuizChoice.Meta.ordering, so the prefetch cache serves `choices`
+        return queryset.prefetch_related("choices")
+
     def create(self, validated_data):
         choices_data = validated_data.pop("choices", [])
         question = QuizQuestion.objects.create(**validated_data)
+        # Nested validation already produced plain dicts; one INSERT covers every choice
+        choices = []
         for idx, c in enumerate(choices_data, start=1):
-            data = dict(c) if isinstance(c, dict) else {}
-            order = data.pop("order", idx)
-            QuizChoice.objects.create(question=question, order=order, **data)
+            c.setdefault("order", idx)
+            choices.append(QuizChoice(question=question, **c))
+        QuizChoice.objects.bulk_create(choices)
         return question
 
 
-class QuizSerializer(serializers.ModelSerializer):
+class QuizSerializer(CachedFieldsSerializer):
     questions = QuizQuestionSerializer(many=True, required=False)
 
     class Meta:
@@ -225,14 +247,33 @@ class QuizSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ("created_at", "updated_at")
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        # Quiz, questions, choices: three queries for any number of quizzes
+        questions = QuizQuestionSerializer.setup_eager_loading(QuizQuestion.objects.order_by("order", "id"))
+        return queryset.prefetch_related(Prefetch("questions", queryset=questions))
+
     def create(self, validated_data):
         questions_data = validated_data.pop("questions", [])
         quiz = super().create(validated_data)
+        # One INSERT for all questions, then one for all choices; bulk_create sets the
+        # question pks the choices point at
+        questions = []
+        choices_data = []
         for q_idx, q in enumerate(questions_data, start=1):
-            choices = q.pop("choices", [])
-            question = QuizQuestion.objects.create(quiz=quiz, order=q.get("order", q_idx), **q)
-            for c_idx, c in enumerate(choices, start=1):
-                QuizChoice.objects.create(question=question, order=c.get("order", c_idx), **c)
+            choices_data.append(q.pop("choices", []))
+            q.setdefault("order", q_idx)
+            question = QuizQuestion(quiz=quiz, **q)
+            # bulk_create skips save(), so build the answer mirror here
+            question.normalize_answers()
+            questions.append(question)
+        QuizQuestion.objects.bulk_create(questions)
+        choices = []
+        for question, question_choices in zip(questions, choices_data):
+            for c_idx, c in enumerate(question_choices, start=1):
+                c.setdefault("order", c_idx)
+                choices.append(QuizChoice(question=question, **c))
+        QuizChoice.objects.bulk_create(choices)
         return quiz
 
     def update(self, instance, validated_data):
@@ -240,14 +281,45 @@ class QuizSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class QuizAnswerSerializer(serializers.ModelSerializer):
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolves pks from context["prefetched"][model] when a parent loaded them in bulk."""
+
+    def to_internal_value(self, data):
+        prefetched = self.context.get("prefetched", {}).get(self.queryset.model)
+        if prefetched:
+            try:
+                obj = prefetched.get(int(data))
+            except (TypeError, ValueError):
+                obj = None
+            if obj is not None:
+                return obj
+        # Not prefetched (or invalid): let the regular lookup produce the usual errors
+        return super().to_internal_value(data)
+
+
+def _int_pks(values) -> set[int]:
+    pks = set()
+    for value in values:
+        try:
+            pks.add(int(value))
+        except (TypeError, ValueError):
+            continue
+    return pks
+
+
+class QuizAnswerSerializer(CachedFieldsSerializer):
+    question = PrefetchedPrimaryKeyRelatedField(queryset=QuizQuestion.objects)
+    selected_choice = PrefetchedPrimaryKeyRelatedField(
+        queryset=QuizChoice.objects, allow_null=True, required=False
+    )
+
     class Meta:
         model = QuizAnswer
         fields = ["id", "question", "selected_choice", "text_answer", "is_correct"]
         read_only_fields = ("is_correct",)
 
 
-class QuizSubmissionSerializer(serializers.ModelSerializer):
+class QuizSubmissionSerializer(CachedFieldsSerializer):
     answers = QuizAnswerSerializer(many=True)
 
     class Meta:
@@ -255,13 +327,28 @@ class QuizSubmissionSerializer(serializers.ModelSerializer):
         fields = ["id", "user", "quiz", "submitted_at", "score", "max_score", "answers"]
         read_only_fields = ("user", "submitted_at", "score", "max_score")
 
+    def to_internal_value(self, data):
+        # Load every referenced question and choice up front (two queries) rather than
+        # one lookup per answer field during nested validation
+        answers = data.get("answers") if hasattr(data, "get") else None
+        if isinstance(answers, list):
+            rows = [a for a in answers if isinstance(a, dict)]
+            self.context["prefetched"] = {
+                QuizQuestion: QuizQuestion.objects.in_bulk(_int_pks(a.get("question") for a in rows)),
+                QuizChoice: QuizChoice.objects.in_bulk(_int_pks(a.get("selected_choice") for a in rows)),
+            }
+        return super().to_internal_value(data)
+
     def create(self, validated_data):
         answers_data = validated_data.pop("answers", [])
-        submission = QuizSubmission.objects.create(**validated_data)
 
-        # Auto-evaluate
+        # Auto-evaluate first so the submission is inserted with its score, then the
+        # answers go in with one bulk INSERT
         score = 0.0
         max_score = 0.0
+        answers = []
+        # Short-answer expectations normalized once per question, not once per answer
+        expected_by_question: dict[int, list[str]] = {}
         for ans in answers_data:
             question = ans["question"]
             selected_choice = ans.get("selected_choice")
@@ -270,53 +357,61 @@ class QuizSubmissionSerializer(serializers.ModelSerializer):
             is_correct = False
             if question.question_type == QuizQuestion.TYPE_MCQ and selected_choice:
                 is_correct = bool(getattr(selected_choice, "is_correct", False))
-                QuizAnswer.objects.create(
-                    submission=submission,
-                    question=question,
-                    selected_choice=selected_choice,
-                    is_correct=is_correct,
+                answers.append(
+                    QuizAnswer(
+                        question=question,
+                        selected_choice=selected_choice,
+                        is_correct=is_correct,
+                    )
                 )
                 max_score += 1
                 if is_correct:
                     score += 1
             else:
-                # Short answer: naive contains check from data["answers"]
-                expected = (question.data or {}).get("answers", [])
+                # Short answer: naive contains check against the answers normalized at save time
+                expected = expected_by_question.get(question.pk)
+                if expected is None:
+                    expected = question.answers_norm
+                    if expected is None:
+                        # Case-sensitive questions keep their answers as written
+                        data = question.data if isinstance(question.data, dict) else {}
+                        expected = data.get("answers", [])
+                    expected_by_question[question.pk] = expected
                 txt = (text_answer or "").strip().lower()
-                if (question.data or {}).get("case_insensitive", True):
-                    expected = [str(e).strip().lower() for e in expected]
                 is_correct = any(e in txt for e in expected) if expected else False
-                QuizAnswer.objects.create(
-                    submission=submission,
-                    question=question,
-                    text_answer=text_answer,
-                    is_correct=is_correct,
+                answers.append(
+                    QuizAnswer(
+                        question=question,
+                        text_answer=text_answer,
+                        is_correct=is_correct,
+                    )
                 )
                 max_score += 1
                 if is_correct:
                     score += 1
 
-        submission.score = score
-        submission.max_score = max_score or 1.0
-        submission.save()
+        submission = QuizSubmission.objects.create(**validated_data, score=score, max_score=max_score or 1.0)
+        for answer in answers:
+            answer.submission = submission
+        QuizAnswer.objects.bulk_create(answers)
         return submission
 
 
-class ExerciseSerializer(serializers.ModelSerializer):
+class ExerciseSerializer(CachedFieldsSerializer):
     class Meta:
         model = Exercise
         fields = ["id", "lesson", "title", "description", "data", "order", "is_published", "created_at"]
         read_only_fields = ("created_at",)
 
 
-class ExerciseSubmissionSerializer(serializers.ModelSerializer):
+class ExerciseSubmissionSerializer(CachedFieldsSerializer):
     class Meta:
         model = ExerciseSubmission
         fields = ["id", "user", "exercise", "submitted_at", "content", "score", "max_score", "feedback"]
         read_only_fields = ("user", "submitted_at", "score", "max_score", "feedback")
 
 
-class PromptTemplateCategorySerializer(serializers.ModelSerializer):
+class PromptTemplateCategorySerializer(CachedFieldsSerializer):
     slug = serializers.ReadOnlyField()
 
     class Meta:
@@ -325,7 +420,7 @@ class PromptTemplateCategorySerializer(serializers.ModelSerializer):
         read_only_fields = ("slug", "created_at", "updated_at")
 
 
-class PromptTemplateSerializer(serializers.ModelSerializer):
+class PromptTemplateSerializer(CachedFieldsSerializer):
     slug = serializers.ReadOnlyField()
     created_by = serializers.PrimaryKeyRelatedField(read_only=True)
 
@@ -351,21 +446,14 @@ class PromptTemplateSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         content = attrs.get("content", self.instance.content if self.instance else "")
         declared_vars = set(attrs.get("variables", self.instance.variables if self.instance else []))
-        found_vars = set(VAR_PATTERN.findall(content))
+        found_vars = template_variables(content)
         missing = found_vars - declared_vars
         if missing:
             raise serializers.ValidationError({"variables": f"Missing variable declarations for: {', '.join(sorted(missing))}"})
         # Normalize tags here as well
         tags = attrs.get("tags")
         if tags is not None:
-            seen = set()
-            norm = []
-            for t in tags:
-                s = str(t).strip().lower()
-                if s and s not in seen:
-                    seen.add(s)
-                    norm.append(s)
-            attrs["tags"] = norm
+            attrs["tags"] = normalize_tags(tags)
         return attrs
 
     def create(self, validated_data):
@@ -376,7 +464,7 @@ class PromptTemplateSerializer(serializers.ModelSerializer):
 
 
 # 3.7 Serializers
-class CoursePromptItemSerializer(serializers.ModelSerializer):
+class CoursePromptItemSerializer(CachedFieldsSerializer):
     slug = serializers.ReadOnlyField()
     template_detail = PromptTemplateSerializer(source="template", read_only=True)
 
@@ -400,12 +488,16 @@ class CoursePromptItemSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ("slug", "created_at")
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.select_related("template")
+
     def validate(self, attrs):
         # If content_override provided, ensure variables_override covers its placeholders
         content = attrs.get("content_override")
         if content:
             declared = set(attrs.get("variables_override", []))
-            found = set(VAR_PATTERN.findall(content))
+            found = template_variables(content)
             missing = found - declared
             if missing:
                 raise serializers.ValidationError({
@@ -414,18 +506,11 @@ class CoursePromptItemSerializer(serializers.ModelSerializer):
         # Normalize tag overrides
         tags = attrs.get("tags_override")
         if tags is not None:
-            seen = set()
-            norm = []
-            for t in tags:
-                s = str(t).strip().lower()
-                if s and s not in seen:
-                    seen.add(s)
-                    norm.append(s)
-            attrs["tags_override"] = norm
+            attrs["tags_override"] = normalize_tags(tags)
         return attrs
 
 
-class CoursePromptCollectionSerializer(serializers.ModelSerializer):
+class CoursePromptCollectionSerializer(CachedFieldsSerializer):
     slug = serializers.ReadOnlyField()
     created_by = serializers.PrimaryKeyRelatedField(read_only=True)
     items = CoursePromptItemSerializer(many=True, required=False)
@@ -448,14 +533,27 @@ class CoursePromptCollectionSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ("slug", "created_by", "created_at", "updated_at")
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        # CoursePromptItem's default manager already joins each item's template
+        return queryset.prefetch_related("items")
+
     def create(self, validated_data):
         items_data = validated_data.pop("items", [])
         request = self.context.get("request")
         if request and request.user and request.user.is_authenticated:
             validated_data["created_by"] = request.user
         collection = super().create(validated_data)
+        # One slug query for the whole collection; tags_override is already normalized by validate()
+        allocator = _SlugAllocator(CoursePromptItem, scope_filter={"collection": collection})
+        items = []
         for idx, item in enumerate(items_data, start=1):
-            CoursePromptItem.objects.create(collection=collection, order=item.get("order", idx), **item)
+            item.pop("collection", None)
+            item.setdefault("order", idx)
+            obj = CoursePromptItem(collection=collection, **item)
+            obj.slug = allocator.allocate(obj, obj.title or obj.template.title)
+            items.append(obj)
+        CoursePromptItem.objects.bulk_create(items)
         return collection
 
     def update(self, instance, validated_data):
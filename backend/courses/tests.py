@@ -1,3 +1,297 @@
-from django.test import TestCase
+import os
+import tempfile
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from authentication.models import User
+
+from .models import (
+    Course,
+    CoursePromptCollection,
+    CoursePromptItem,
+    Exercise,
+    Lesson,
+    Module,
+    PromptTemplate,
+    Quiz,
+    QuizAnswer,
+    QuizQuestion,
+    QuizSubmission,
+    _assign_unique_slugs,
+)
+from .utils import normalize_tags, render_template, template_variables
+
+
+class UtilsTests(SimpleTestCase):
+    def test_normalize_tags(self):
+        self.assertEqual(normalize_tags([" AI ", "ai", "", "Prompting", None]), ["ai", "prompting", "none"])
+        self.assertEqual(normalize_tags(None), [])
+
+    def test_template_variables(self):
+        self.assertEqual(template_variables("Hi {name}, see {topic} and {name}"), frozenset({"name", "topic"}))
+        self.assertEqual(template_variables("no braces"), frozenset())
+
+    def test_render_template_only_touches_declared_variables(self):
+        content = 'Dear {name}, {greeting}! {"json": {name}} {nam}'
+        rendered = render_template(content, ["name", "nam", "greeting"], {"name": "Ada", "nam": "X"})
+        self.assertEqual(rendered, 'Dear Ada, {greeting}! {"json": Ada} X')
+        self.assertEqual(render_template("{a} {b}", ["a"], {"a": 1, "b": 2}), "1 {b}")
+
+
+class CourseTestCase(TestCase):
+    """Shared fixture: one published course with a single lesson, and an admin client."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="teacher", email="teacher@example.com", password="Sturdy-pass-987", role=User.Roles.ADMIN
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.course = Course.objects.create(title="Course", created_by=self.user, is_published=True)
+        self.module = Module.objects.create(course=self.course, title="Module")
+        self.lesson = Lesson.objects.create(module=self.module, title="Lesson")
+
+
+class SlugTests(CourseTestCase):
+    def test_course_slugs_skip_past_the_highest_suffix(self):
+        Course.objects.create(title="Intro", slug="intro-7")
+        self.assertEqual(Course.objects.create(title="Intro").slug, "intro")
+        self.assertEqual(Course.objects.create(title="Intro").slug, "intro-8")
+
+    def test_module_slugs_are_scoped_to_their_course(self):
+        other = Course.objects.create(title="Other")
+        self.assertEqual(Module.objects.create(course=other, title="Module").slug, self.module.slug)
+        self.assertEqual(Module.objects.create(course=self.course, title="Module").slug, "module-2")
+
+    def test_bulk_assignment_uses_one_query(self):
+        PromptTemplate.objects.create(title="Summarize", content="x")
+        templates = [PromptTemplate(title="Summarize", content="x") for _ in range(3)]
+        with self.assertNumQueries(1):
+            _assign_unique_slugs(templates, "title")
+        self.assertEqual([t.slug for t in templates], ["summarize-2", "summarize-3", "summarize-4"])
+
+
+class QuizGradingTests(CourseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.quiz = Quiz.objects.create(lesson=self.lesson, title="Quiz", is_published=True)
+
+    def _question(self, data) -> QuizQuestion:
+        return QuizQuestion.objects.create(
+            quiz=self.quiz, text="Name it", question_type=QuizQuestion.TYPE_SHORT, data=data
+        )
+
+    def _submit(self, *answers):
+        payload = {"quiz": self.quiz.id, "answers": [{"question": q.id, "text_answer": t} for q, t in answers]}
+        return self.client.post("/api/courses/quiz-submissions/", payload, format="json")
+
+    def test_normalized_answers_are_kept_out_of_data(self):
+        question = self._question({"answers": ["  Paris "]})
+        self.assertEqual(question.answers_norm, ["paris"])
+        response = self.client.get(f"/api/courses/quiz-questions/{question.id}/")
+        self.assertEqual(response.data["data"], {"answers": ["  Paris "]})
+
+    def test_non_dict_data_is_left_alone(self):
+        question = self._question(["Paris"])
+        question.refresh_from_db()
+        self.assertEqual(question.data, ["Paris"])
+        self.assertEqual(question.answers_norm, [])
+
+    def test_short_answers_are_scored_in_bulk(self):
+        loose = self._question({"answers": ["Paris"]})
+        strict = self._question({"answers": ["Paris"], "case_insensitive": False})
+        response = self._submit((loose, "it is PARIS"), (strict, "paris"))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data["score"], response.data["max_score"]), (1.0, 2.0))
+        self.assertEqual([a["is_correct"] for a in response.data["answers"]], [True, False])
+
+    def test_recalculate_scores(self):
+        question = self._question({"answers": ["Paris"]})
+        submission = QuizSubmission.objects.create(user=self.user, quiz=self.quiz)
+        empty = QuizSubmission.objects.create(user=self.user, quiz=self.quiz, score=5)
+        QuizAnswer.objects.create(submission=submission, question=question, text_answer="paris", is_correct=True)
+        QuizSubmission.recalculate_scores([submission.id, empty.id])
+        submission.refresh_from_db()
+        empty.refresh_from_db()
+        self.assertEqual((submission.score, submission.max_score), (1.0, 1.0))
+        self.assertEqual((empty.score, empty.max_score), (0.0, 1.0))
+
+    def test_updating_answers_refreshes_the_mirror(self):
+        question = self._question({"answers": ["Paris"]})
+        question.data = {"answers": ["Rome"]}
+        question.save(update_fields=["data"])
+        question.refresh_from_db()
+        self.assertEqual(question.answers_norm, ["rome"])
+
+    def test_nested_quiz_create_fills_the_mirror(self):
+        payload = {
+            "lesson": self.lesson.id,
+            "title": "Nested",
+            "questions": [{"text": "Capital?", "question_type": "short", "data": {"answers": ["Rome "]}}],
+        }
+        response = self.client.post("/api/courses/quizzes/", payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        question = QuizQuestion.objects.get(quiz_id=response.data["id"])
+        self.assertEqual(question.answers_norm, ["rome"])
+        self.assertEqual(response.data["questions"][0]["data"], {"answers": ["Rome "]})
+
+
+class ExerciseEvaluationTests(CourseTestCase):
+    def _exercise(self, data) -> Exercise:
+        return Exercise.objects.create(lesson=self.lesson, title="Explain", data=data, is_published=True)
+
+    def test_normalized_keywords_are_kept_out_of_data(self):
+        exercise = self._exercise({"expected_keywords": ["Token", "Context"]})
+        self.assertEqual(exercise.expected_keywords_norm, ["token", "context"])
+        response = self.client.get(f"/api/courses/exercises/{exercise.id}/")
+        self.assertEqual(response.data["data"], {"expected_keywords": ["Token", "Context"]})
+
+    def test_non_dict_data_is_left_alone(self):
+        exercise = self._exercise(["Token"])
+        exercise.refresh_from_db()
+        self.assertEqual(exercise.data, ["Token"])
+        self.assertEqual(exercise.expected_keywords_norm, [])
+
+    def test_submission_is_scored_against_the_mirror(self):
+        exercise = self._exercise({"expected_keywords": ["Token", "Context"], "min_matches": 1})
+        response = self.client.post(
+            "/api/courses/exercise-submissions/",
+            {"exercise": exercise.id, "content": "Every TOKEN counts"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data["score"], response.data["max_score"]), (1.0, 2.0))
+        self.assertEqual(response.data["feedback"], "Good job")
+
+
+class ListFilterTests(CourseTestCase):
+    def test_quiz_filters_combine(self):
+        Quiz.objects.create(lesson=self.lesson, title="Draft tokens", is_published=False)
+        Quiz.objects.create(lesson=self.lesson, title="Published tokens", is_published=True)
+        response = self.client.get(f"/api/courses/lessons/{self.lesson.id}/quizzes/", {"is_published": "true", "q": "tokens"})
+        self.assertEqual([quiz["title"] for quiz in response.data], ["Published tokens"])
+
+
+class LessonCourseSyncTests(CourseTestCase):
+    """Lesson.course mirrors module.course on every write path, not only save()."""
+
+    def setUp(self):
+        super().setUp()
+        self.other_course = Course.objects.create(title="Other", created_by=self.user)
+        self.other_module = Module.objects.create(course=self.other_course, title="Other module")
+
+    def assertInSync(self):
+        stale = Lesson.objects.exclude(course_id=F("module__course_id"))
+        self.assertFalse(stale.exists(), list(stale.values("id", "course_id", "module__course_id")))
+
+    def test_bulk_create(self):
+        Lesson.objects.bulk_create([Lesson(module_id=self.other_module.id, title="A", slug="a")])
+        self.assertInSync()
+
+    def test_bulk_update_of_module(self):
+        self.lesson.module = self.other_module
+        Lesson.objects.bulk_update([self.lesson], ["module"])
+        self.assertInSync()
+        self.assertEqual(Lesson.objects.get(pk=self.lesson.pk).course_id, self.other_course.id)
+
+    def test_queryset_update_of_module(self):
+        Lesson.objects.filter(pk=self.lesson.pk).update(module=self.other_module)
+        self.assertInSync()
+        self.module.lessons.update(module_id=self.module.id)
+        self.assertInSync()
+
+    def test_module_moves(self):
+        Module.objects.filter(course=self.course).update(course=self.other_course)
+        self.assertInSync()
+        self.module.refresh_from_db()
+        self.module.course = self.course
+        Module.objects.bulk_update([self.module], ["course"])
+        self.assertInSync()
+        self.module.course = self.other_course
+        self.module.save()
+        self.assertInSync()
+
+    def test_module_moved_back_after_refresh(self):
+        Module.objects.filter(pk=self.module.pk).update(course=self.other_course)
+        self.module.refresh_from_db()
+        self.module.course = self.course
+        self.module.save()
+        self.assertInSync()
+
+    def test_module_edit_without_move_skips_lessons(self):
+        module = Module.objects.get(pk=self.module.pk)
+        module.title = "Renamed"
+        with self.assertNumQueries(1):
+            module.save()
+        with self.assertNumQueries(1):
+            module.save(update_fields=["title"])
+        module.course = self.other_course
+        with self.assertNumQueries(1):
+            module.save(update_fields=["title"])
+        with self.assertNumQueries(2):
+            module.save(update_fields=["course"])
+        self.assertInSync()
+
+
+class PromptCollectionTests(CourseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = PromptTemplate.objects.create(
+            title="Explain", content="Explain {topic} to {audience}", variables=["topic", "audience"], tags=["ai"]
+        )
+        self.collection = CoursePromptCollection.objects.create(course=self.course, title="Prompts")
+        CoursePromptItem.objects.create(collection=self.collection, template=self.template, order=2)
+        CoursePromptItem.objects.create(
+            collection=self.collection, template=self.template, title="Custom", order=1, tags_override=[" Beginner "]
+        )
+
+    def test_resolved_merges_overrides_and_renders(self):
+        url = f"/api/courses/prompt-collections/{self.collection.id}/resolved/"
+        with self.assertNumQueries(2):
+            response = self.client.post(url, {"topic": "tokens"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        items = response.data["items"]
+        self.assertEqual([item["title"] for item in items], ["Custom", "Explain"])
+        self.assertEqual(items[0]["tags"], ["beginner"])
+        self.assertEqual(items[1]["rendered"], "Explain tokens to {audience}")
+        self.assertEqual(items[0]["template"]["id"], self.template.id)
+
+    def test_template_preview(self):
+        url = f"/api/courses/prompt-templates/{self.template.id}/preview/"
+        response = self.client.post(url, {"topic": "RAG", "audience": "PMs"}, format="json")
+        self.assertEqual(response.data["rendered"], "Explain RAG to PMs")
+
+
+class CourseFileTests(CourseTestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media_root = media.name
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _upload(self, name: str, path: str):
+        upload = SimpleUploadedFile(name, b"data")
+        return self.client.post("/api/courses/upload/", {"file": upload, "path": path}, format="multipart")
+
+    def test_upload_names_avoid_collisions(self):
+        path = f"{self.course.id}/{self.module.id}/{self.lesson.id}"
+        names = [self._upload("notes#v1.txt", path).data["filename"] for _ in range(3)]
+        self.assertEqual(names, ["notes_v1.txt", "notes_v1_1.txt", "notes_v1_2.txt"])
+
+    def test_listing_groups_by_lesson_and_skips_unknown_dirs(self):
+        self._upload("slides.pdf", f"{self.course.id}/{self.module.id}/{self.lesson.id}")
+        stray = os.path.join(self.media_root, "uploads", str(self.course.id), "misc", "x")
+        os.makedirs(stray)
+        open(os.path.join(stray, "readme.txt"), "w").close()
+        with self.assertNumQueries(3):
+            response = self.client.get(f"/api/courses/files/{self.course.id}/")
+        self.assertEqual(response.status_code, 200)
+        (location,) = response.data["files"].values()
+        self.assertEqual(location["lesson_title"], "Lesson")
+        self.assertEqual([f["filename"] for f in location["files"]], ["slides.pdf"])
@@ -0,0 +1,44 @@
+import re
+from functools import lru_cache
+
+# {placeholder} names in prompt template content
+VAR_PATTERN = re.compile(r"\{([a-zA-Z_][a-zA-Z0-9_]*)\}", re.ASCII)
+
+
+def normalize_tags(tags) -> list[str]:
+    """Lowercase and strip tags, dropping blanks and duplicates while keeping order."""
+    if not tags:
+        return []
+    # dict.fromkeys dedupes in C and preserves first-seen order
+    return list(dict.fromkeys(s for t in tags if (s := str(t).strip().lower())))
+
+
+@lru_cache(maxsize=1024)
+def template_variables(content: str) -> frozenset[str]:
+    """Return the {placeholder} names used in content.
+
+    Cached because validate() re-checks the same content across partial and full updates.
+    """
+    # Content without a brace can't hold a placeholder; skip the regex scan
+    if not content or "{" not in content:
+        return frozenset()
+    return frozenset(VAR_PATTERN.findall(content))
+
+
+@lru_cache(maxsize=1024)
+def _placeholder_pattern(names: tuple[str, ...]) -> re.Pattern:
+    # Longest names first so a name that prefixes another can't shadow it
+    alternatives = "|".join(re.escape(n) for n in sorted(names, key=len, reverse=True))
+    return re.compile(r"\{(" + alternatives + r")\}")
+
+
+def render_template(content: str, variables, values) -> str:
+    """Substitute {var} for each declared variable in one pass over content.
+
+    Variables without a value are left as literal {var}; braces that aren't declared
+    variables (JSON examples etc.) are never touched.
+    """
+    if not content or not variables or "{" not in content:
+        return content
+    pattern = _placeholder_pattern(tuple(variables))
+    return pattern.sub(lambda m: str(values.get(m.group(1), m.group(0))), content)
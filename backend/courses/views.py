@@ -3,10 +3,9 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
-from django.db.models import Q
+from django.db.models import Prefetch, Q
 from django.conf import settings
 from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
 import os
 import uuid
 import re
@@ -52,6 +51,10 @@ from .serializers import (
     CoursePromptCollectionSerializer,
     CoursePromptItemSerializer,
 )
+from .utils import normalize_tags, render_template
+
+# Characters replaced with "_" in uploaded file names
+_FILENAME_UNSAFE_RE = re.compile(r'[^\w\-_\. ]')
 
 
 def _get_bool(param_value: str | None) -> bool | None:
@@ -60,31 +63,38 @@ def _get_bool(param_value: str | None) -> bool | None:
     return param_value.strip().lower() in {"1", "true", "yes", "on"}
 
 
+def _is_admin_or_instructor(user) -> bool:
+    # Anonymous users have no role attribute
+    return getattr(user, "role", None) in IsAdminOrInstructor.required_roles
+
+
 class CourseViewSet(viewsets.ModelViewSet):
     serializer_class = CourseSerializer
 
     def get_queryset(self):
         qs = Course.objects.all().order_by("title")
         params = self.request.query_params
+        # Collect every condition into one Q so the queryset is cloned by a single filter()
+        filters = Q()
 
         # No parent kwargs for Course, but still support standard filtering
         slug = params.get("slug")
         if slug:
-            qs = qs.filter(slug=slug)
+            filters &= Q(slug__lower=slug.lower())
 
         is_published = _get_bool(params.get("is_published"))
         if is_published is not None:
-            qs = qs.filter(is_published=is_published)
+            filters &= Q(is_published=is_published)
 
         created_by = params.get("created_by")
         if created_by:
-            qs = qs.filter(created_by_id=created_by)
+            filters &= Q(created_by_id=created_by)
 
         q = params.get("q")
         if q:
-            qs = qs.filter(Q(title__icontains=q) | Q(description__icontains=q))
+            filters &= Q(title__icontains=q) | Q(description__icontains=q)
 
-        return qs
+        return qs.filter(filters)
 
     def get_permissions(self):
         if self.action in {"list", "retrieve", "modules", "lessons"}:
@@ -94,14 +104,14 @@ class CourseViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["get"])
     def modules(self, request, pk=None):
         course = self.get_object()
-        modules = course.modules.order_by("order", "id")
+        modules = ModuleSerializer.setup_eager_loading(course.modules.order_by("order", "id"))
         serializer = ModuleSerializer(modules, many=True)
         return self.get_response(serializer.data)
 
     @action(detail=True, methods=["get"], url_path="lessons")
     def lessons(self, request, pk=None):
         course = self.get_object()
-        lessons = Lesson.objects.filter(module__course=course).order_by(
+        lessons = LessonSerializer.setup_eager_loading(Lesson.objects.filter(course=course)).order_by(
             "module__order", "module_id", "order", "id"
         )
         serializer = LessonSerializer(lessons, many=True)
@@ -118,31 +128,32 @@ class ModuleViewSet(viewsets.ModelViewSet):
     serializer_class = ModuleSerializer
 
     def get_queryset(self):
-        qs = Module.objects.select_related("course").all()
+        qs = self.get_serializer_class().setup_eager_loading(Module.objects.all())
         params = self.request.query_params
+        filters = Q()
 
         # Nested: /courses/{course_pk}/modules/
         course_pk = self.kwargs.get("course_pk")
         if course_pk:
-            qs = qs.filter(course_id=course_pk)
+            filters &= Q(course_id=course_pk)
 
         course_id = params.get("course")
         if course_id:
-            qs = qs.filter(course_id=course_id)
+            filters &= Q(course_id=course_id)
 
         course_slug = params.get("course_slug")
         if course_slug:
-            qs = qs.filter(course__slug=course_slug)
+            filters &= Q(course__slug__lower=course_slug.lower())
 
         slug = params.get("slug")
         if slug:
-            qs = qs.filter(slug=slug)
+            filters &= Q(slug=slug)
 
         q = params.get("q")
         if q:
-            qs = qs.filter(Q(title__icontains=q) | Q(description__icontains=q))
+            filters &= Q(title__icontains=q) | Q(description__icontains=q)
 
-        return qs.order_by("course_id", "order", "id")
+        return qs.filter(filters).order_by("course_id", "order", "id")
 
     def get_permissions(self):
         if self.action in {"list", "retrieve", "lessons"}:
@@ -152,7 +163,7 @@ class ModuleViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["get"])
     def lessons(self, request, pk=None):
         module = self.get_object()
-        lessons = module.lessons.order_by("order", "id")
+        lessons = LessonSerializer.setup_eager_loading(module.lessons.order_by("order", "id"))
         serializer = LessonSerializer(lessons, many=True)
         return Response(serializer.data)
 
@@ -161,43 +172,44 @@ class LessonViewSet(viewsets.ModelViewSet):
     serializer_class = LessonSerializer
 
     def get_queryset(self):
-        qs = Lesson.objects.select_related("module", "module__course").all()
+        qs = self.get_serializer_class().setup_eager_loading(Lesson.objects.all())
         params = self.request.query_params
+        filters = Q()
 
         # Nested: /courses/{course_pk}/lessons/ and /modules/{module_pk}/lessons/
         course_pk = self.kwargs.get("course_pk")
         if course_pk:
-            qs = qs.filter(module__course_id=course_pk)
+            filters &= Q(course_id=course_pk)
 
         module_pk = self.kwargs.get("module_pk")
         if module_pk:
-            qs = qs.filter(module_id=module_pk)
+            filters &= Q(module_id=module_pk)
 
         module_id = params.get("module")
         if module_id:
-            qs = qs.filter(module_id=module_id)
+            filters &= Q(module_id=module_id)
 
         module_slug = params.get("module_slug")
         if module_slug:
-            qs = qs.filter(module__slug=module_slug)
+            filters &= Q(module__slug=module_slug)
 
         course_slug = params.get("course_slug")
         if course_slug:
-            qs = qs.filter(module__course__slug=course_slug)
+            filters &= Q(course__slug__lower=course_slug.lower())
 
         slug = params.get("slug")
         if slug:
-            qs = qs.filter(slug=slug)
+            filters &= Q(slug=slug)
 
         is_published = _get_bool(params.get("is_published"))
         if is_published is not None:
-            qs = qs.filter(is_published=is_published)
+            filters &= Q(is_published=is_published)
 
         q = params.get("q")
         if q:
-            qs = qs.filter(Q(title__icontains=q) | Q(content__icontains=q))
+            filters &= Q(title__icontains=q) | Q(content__icontains=q)
 
-        return qs.order_by("module__order", "module_id", "order", "id")
+        return qs.filter(filters).order_by("module__order", "module_id", "order", "id")
 
     def get_permissions(self):
         if self.action in {"list", "retrieve", "content_blocks"}:
@@ -218,50 +230,51 @@ class ContentBlockViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         qs = ContentBlock.objects.select_related("lesson", "lesson__module").all()
         params = self.request.query_params
+        filters = Q()
 
         # Nested: /lessons/{lesson_pk}/content-blocks/
         lesson_pk = self.kwargs.get("lesson_pk")
         if lesson_pk:
-            qs = qs.filter(lesson_id=lesson_pk)
+            filters &= Q(lesson_id=lesson_pk)
 
         # Nested via higher parents (not directly registered but allow filtering)
         module_pk = self.kwargs.get("module_pk")
         if module_pk:
-            qs = qs.filter(lesson__module_id=module_pk)
+            filters &= Q(lesson__module_id=module_pk)
 
         course_pk = self.kwargs.get("course_pk")
         if course_pk:
-            qs = qs.filter(lesson__module__course_id=course_pk)
+            filters &= Q(lesson__course_id=course_pk)
 
         lesson_id = params.get("lesson")
         if lesson_id:
-            qs = qs.filter(lesson_id=lesson_id)
+            filters &= Q(lesson_id=lesson_id)
 
         module_id = params.get("module")
         if module_id:
-            qs = qs.filter(lesson__module_id=module_id)
+            filters &= Q(lesson__module_id=module_id)
 
         module_slug = params.get("module_slug")
         if module_slug:
-            qs = qs.filter(lesson__module__slug=module_slug)
+            filters &= Q(lesson__module__slug=module_slug)
 
         course_slug = params.get("course_slug")
         if course_slug:
-            qs = qs.filter(lesson__module__course__slug=course_slug)
+            filters &= Q(lesson__course__slug__lower=course_slug.lower())
 
         block_type = params.get("block_type")
         if block_type:
-            qs = qs.filter(block_type=block_type)
+            filters &= Q(block_type=block_type)
 
         is_published = _get_bool(params.get("is_published"))
         if is_published is not None:
-            qs = qs.filter(is_published=is_published)
+            filters &= Q(is_published=is_published)
 
         q = params.get("q")
         if q:
-            qs = qs.filter(Q(title__icontains=q))
+            filters &= Q(title__icontains=q)
 
-        return qs.order_by("lesson__module__order", "lesson__order", "order", "id")
+        return qs.filter(filters).order_by("lesson__module__order", "lesson__order", "order", "id")
 
     def get_permissions(self):
         if self.action in {"list", "retrieve"}:
@@ -275,30 +288,30 @@ class LessonProgressViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         qs = LessonProgress.objects.select_related("lesson", "user", "lesson__module", "lesson__module__course")
+        filters = Q()
         # Limit to current user unless admin/instructor explicitly wants all
         user = self.request.user
-        if not (hasattr(user, "role") and user.role in {"admin", "instructor"}):
-            qs = qs.filter(user=user)
+        if not _is_admin_or_instructor(user):
+            filters &= Q(user=user)
 
         params = self.request.query_params
         lesson_id = params.get("lesson")
         if lesson_id:
-            qs = qs.filter(lesson_id=lesson_id)
+            filters &= Q(lesson_id=lesson_id)
 
         module_id = params.get("module")
         if module_id:
-            qs = qs.filter(lesson__module_id=module_id)
+            filters &= Q(lesson__module_id=module_id)
 
         course_id = params.get("course")
         if course_id:
-            qs = qs.filter(lesson__module__course_id=course_id)
+            filters &= Q(lesson__course_id=course_id)
 
-        is_completed = params.get("is_completed")
+        is_completed = _get_bool(params.get("is_completed"))
         if is_completed is not None:
-            val = is_completed.strip().lower() in {"1", "true", "yes", "on"}
-            qs = qs.filter(is_completed=val)
+            filters &= Q(is_completed=is_completed)
 
-        return qs.order_by("-completed_at", "lesson_id")
+        return qs.filter(filters).order_by("-completed_at", "lesson_id")
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -321,7 +334,7 @@ class UserBadgeViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         qs = UserBadge.objects.select_related("badge", "user", "badge__course")
         user = self.request.user
-        if not (hasattr(user, "role") and user.role in {"admin", "instructor"}):
+        if not _is_admin_or_instructor(user):
             qs = qs.filter(user=user)
         return qs.order_by("-awarded_at")
 
@@ -330,7 +343,7 @@ class UserBadgeViewSet(viewsets.ModelViewSet):
         user = self.request.user
         target_user = user
         target = self.request.data.get("user")
-        if target and hasattr(user, "role") and user.role in {"admin", "instructor"}:
+        if target and _is_admin_or_instructor(user):
             target_user = target
         serializer.save(user=target_user)
 
@@ -339,26 +352,27 @@ class QuizViewSet(viewsets.ModelViewSet):
     serializer_class = QuizSerializer
 
     def get_queryset(self):
-        qs = Quiz.objects.select_related("lesson", "lesson__module", "lesson__module__course").all()
+        qs = self.get_serializer_class().setup_eager_loading(Quiz.objects.all())
         params = self.request.query_params
+        filters = Q()
 
         lesson_pk = self.kwargs.get("lesson_pk")
         if lesson_pk:
-            qs = qs.filter(lesson_id=lesson_pk)
+            filters &= Q(lesson_id=lesson_pk)
 
         lesson_id = params.get("lesson")
         if lesson_id:
-            qs = qs.filter(lesson_id=lesson_id)
+            filters &= Q(lesson_id=lesson_id)
 
         is_published = _get_bool(params.get("is_published"))
         if is_published is not None:
-            qs = qs.filter(is_published=is_published)
+            filters &= Q(is_published=is_published)
 
         q = params.get("q")
         if q:
-            qs = qs.filter(Q(title__icontains=q) | Q(description__icontains=q))
+            filters &= Q(title__icontains=q) | Q(description__icontains=q)
 
-        return qs.order_by("lesson_id", "order", "id")
+        return qs.filter(filters).order_by("lesson_id", "order", "id")
 
     def get_permissions(self):
         if self.action in {"list", "retrieve"}:
@@ -370,7 +384,7 @@ class QuizQuestionViewSet(viewsets.ModelViewSet):
     serializer_class = QuizQuestionSerializer
 
     def get_queryset(self):
-        qs = QuizQuestion.objects.select_related("quiz", "quiz__lesson").all()
+        qs = self.get_serializer_class().setup_eager_loading(QuizQuestion.objects.all())
         quiz_pk = self.kwargs.get("quiz_pk")
         if quiz_pk:
             qs = qs.filter(quiz_id=quiz_pk)
@@ -420,14 +434,15 @@ class QuizSubmissionViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         qs = QuizSubmission.objects.select_related("quiz", "quiz__lesson").all()
+        filters = Q()
         user = self.request.user
-        if not (hasattr(user, "role") and user.role in {"admin", "instructor"}):
-            qs = qs.filter(user=user)
+        if not _is_admin_or_instructor(user):
+            filters &= Q(user=user)
 
         quiz_pk = self.kwargs.get("quiz_pk")
         if quiz_pk:
-            qs = qs.filter(quiz_id=quiz_pk)
-        return qs.order_by("-submitted_at", "id")
+            filters &= Q(quiz_id=quiz_pk)
+        return qs.filter(filters).order_by("-submitted_at", "id")
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -455,20 +470,22 @@ class ExerciseSubmissionViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         qs = ExerciseSubmission.objects.select_related("exercise", "user").all()
+        filters = Q()
         user = self.request.user
-        if not (hasattr(user, "role") and user.role in {"admin", "instructor"}):
-            qs = qs.filter(user=user)
+        if not _is_admin_or_instructor(user):
+            filters &= Q(user=user)
         exercise_pk = self.kwargs.get("exercise_pk")
         if exercise_pk:
-            qs = qs.filter(exercise_id=exercise_pk)
-        return qs.order_by("-submitted_at", "id")
+            filters &= Q(exercise_id=exercise_pk)
+        return qs.filter(filters).order_by("-submitted_at", "id")
 
     def perform_create(self, serializer):
         # Naive auto-evaluation using expected keywords in exercise.data
         exercise: Exercise = serializer.validated_data["exercise"]
         content: str = serializer.validated_data.get("content", "")
-        data = exercise.data or {}
-        expected = [str(x).lower() for x in data.get("expected_keywords", [])]
+        data = exercise.data if isinstance(exercise.data, dict) else {}
+        # Lowercased at save time
+        expected = exercise.expected_keywords_norm
         min_matches = int(data.get("min_matches", 0))
         txt = content.lower()
         matches = sum(1 for kw in expected if kw in txt)
@@ -495,31 +512,31 @@ class PromptTemplateViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         qs = PromptTemplate.objects.select_related("category", "created_by").all()
         params = self.request.query_params
+        filters = Q()
 
         category = params.get("category")
         if category:
-            qs = qs.filter(category_id=category)
+            filters &= Q(category_id=category)
         category_slug = params.get("category_slug")
         if category_slug:
-            qs = qs.filter(category__slug=category_slug)
+            filters &= Q(category__slug__lower=category_slug.lower())
         tag = params.get("tag")
         if tag:
-            qs = qs.filter(tags__contains=[tag.lower()])
+            filters &= Q(tags__contains=[tag.lower()])
         slug = params.get("slug")
         if slug:
-            qs = qs.filter(slug=slug)
-        is_active = params.get("is_active")
+            filters &= Q(slug__lower=slug.lower())
+        is_active = _get_bool(params.get("is_active"))
         if is_active is not None:
-            flag = is_active.strip().lower() in {"1", "true", "yes", "on"}
-            qs = qs.filter(is_active=flag)
+            filters &= Q(is_active=is_active)
         created_by = params.get("created_by")
         if created_by:
-            qs = qs.filter(created_by_id=created_by)
+            filters &= Q(created_by_id=created_by)
         q = params.get("q")
         if q:
-            qs = qs.filter(Q(title__icontains=q) | Q(description__icontains=q) | Q(content__icontains=q))
+            filters &= Q(title__icontains=q) | Q(description__icontains=q) | Q(content__icontains=q)
 
-        return qs.order_by("category_id", "title")
+        return qs.filter(filters).order_by("category_id", "title")
 
     def get_permissions(self):
         if self.action in {"list", "retrieve", "preview"}:
@@ -531,11 +548,7 @@ class PromptTemplateViewSet(viewsets.ModelViewSet):
         template = self.get_object()
         params = request.data or {}
         # Safe format: leave missing keys unformatted
-        content = template.content
-        for var in (template.variables or []):
-            val = params.get(var, "{" + var + "}")
-            content = content.replace("{" + var + "}", str(val))
-        return Response({"rendered": content})
+        return Response({"rendered": render_template(template.content, template.variables, params)})
 
 
 # 3.7 ViewSets
@@ -543,34 +556,40 @@ class CoursePromptCollectionViewSet(viewsets.ModelViewSet):
     serializer_class = CoursePromptCollectionSerializer
 
     def get_queryset(self):
-        qs = CoursePromptCollection.objects.select_related("course", "created_by").prefetch_related("items").all()
+        if self.action == "resolved":
+            # resolved reads display_title on every item; annotate it in the items prefetch
+            items = CoursePromptItem.objects.with_display_title()
+            qs = CoursePromptCollection.objects.prefetch_related(Prefetch("items", queryset=items))
+        else:
+            qs = self.get_serializer_class().setup_eager_loading(CoursePromptCollection.objects.all())
         params = self.request.query_params
+        filters = Q()
 
         course_pk = self.kwargs.get("course_pk")
         if course_pk:
-            qs = qs.filter(course_id=course_pk)
+            filters &= Q(course_id=course_pk)
 
         course_id = params.get("course")
         if course_id:
-            qs = qs.filter(course_id=course_id)
+            filters &= Q(course_id=course_id)
 
         slug = params.get("slug")
         if slug:
-            qs = qs.filter(slug=slug)
+            filters &= Q(slug=slug)
 
         tag = params.get("tag")
         if tag:
-            qs = qs.filter(tags__contains=[tag.lower()])
+            filters &= Q(tags__contains=[tag.lower()])
 
         is_active = _get_bool(params.get("is_active"))
         if is_active is not None:
-            qs = qs.filter(is_active=is_active)
+            filters &= Q(is_active=is_active)
 
         q = params.get("q")
         if q:
-            qs = qs.filter(Q(title__icontains=q) | Q(description__icontains=q))
+            filters &= Q(title__icontains=q) | Q(description__icontains=q)
 
-        return qs.order_by("course_id", "order", "title", "id")
+        return qs.filter(filters).order_by("course_id", "order", "title", "id")
 
     def get_permissions(self):
         if self.action in {"list", "retrieve", "items", "resolved"}:
@@ -580,8 +599,8 @@ class CoursePromptCollectionViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["get"], url_path="items")
     def items_action(self, request, pk=None):
         collection = self.get_object()
-        items = collection.items.select_related("template").order_by("order", "id")
-        serializer = CoursePromptItemSerializer(items, many=True)
+        # get_object() already prefetched the items, in (order, id) order with their templates
+        serializer = CoursePromptItemSerializer(collection.items.all(), many=True)
         return Response(serializer.data)
 
     @action(detail=True, methods=["post"], url_path="resolved")
@@ -595,7 +614,12 @@ class CoursePromptCollectionViewSet(viewsets.ModelViewSet):
             "collection": CoursePromptCollectionSerializer(collection).data,
             "items": [],
         }
-        for item in collection.items.select_related("template").order_by("order", "id"):
+        # Prefetched by get_object(), with display_title annotated (see get_queryset)
+        items = list(collection.items.all())
+        # Serialize each distinct template once, in one list pass, and look it up per item
+        templates = {item.template_id: item.template for item in items}
+        template_data = {t["id"]: t for t in PromptTemplateSerializer(templates.values(), many=True).data}
+        for item in items:
             tpl = item.template
             content = (item.content_override or tpl.content)
             # variables precedence: override -> template.variables
@@ -606,19 +630,9 @@ class CoursePromptCollectionViewSet(viewsets.ModelViewSet):
             # tags precedence: template.tags extended/overridden by override list if provided
             tags = list(tpl.tags or [])
             if item.tags_override:
-                # ensure unique lowercase
-                seen = set()
-                tags = []
-                for t in (item.tags_override or []):
-                    s = str(t).strip().lower()
-                    if s and s not in seen:
-                        seen.add(s)
-                        tags.append(s)
+                tags = normalize_tags(item.tags_override)
             # Render a preview
-            rendered = content
-            for var in (vars_list or []):
-                val = var_values.get(var, "{" + var + "}")
-                rendered = rendered.replace("{" + var + "}", str(val))
+            rendered = render_template(content, vars_list, var_values)
             result["items"].append(
                 {
                     "id": item.id,
@@ -631,7 +645,7 @@ class CoursePromptCollectionViewSet(viewsets.ModelViewSet):
                     "tags": tags,
                     "order": item.order,
                     "is_active": item.is_active and tpl.is_active,
-                    "template": PromptTemplateSerializer(tpl).data,
+                    "template": template_data[tpl.id],
                     "rendered": rendered,
                 }
             )
@@ -642,30 +656,31 @@ class CoursePromptItemViewSet(viewsets.ModelViewSet):
     serializer_class = CoursePromptItemSerializer
 
     def get_queryset(self):
-        qs = CoursePromptItem.objects.select_related("collection", "template", "collection__course").all()
+        qs = self.get_serializer_class().setup_eager_loading(CoursePromptItem.objects.with_display_title())
         params = self.request.query_params
+        filters = Q()
 
         collection_pk = self.kwargs.get("collection_pk")
         if collection_pk:
-            qs = qs.filter(collection_id=collection_pk)
+            filters &= Q(collection_id=collection_pk)
 
         course_pk = self.kwargs.get("course_pk")
         if course_pk:
-            qs = qs.filter(collection__course_id=course_pk)
+            filters &= Q(collection__course_id=course_pk)
 
         is_active = _get_bool(params.get("is_active"))
         if is_active is not None:
-            qs = qs.filter(is_active=is_active)
+            filters &= Q(is_active=is_active)
 
         slug = params.get("slug")
         if slug:
-            qs = qs.filter(slug=slug)
+            filters &= Q(slug=slug)
 
         q = params.get("q")
         if q:
-            qs = qs.filter(Q(title__icontains=q) | Q(description__icontains=q) | Q(template__title__icontains=q))
+            filters &= Q(title__icontains=q) | Q(description__icontains=q) | Q(template__title__icontains=q)
 
-        return qs.order_by("collection_id", "order", "id")
+        return qs.filter(filters).order_by("collection_id", "order", "id")
 
     def get_permissions(self):
         if self.action in {"list", "retrieve", "preview"}:
@@ -682,17 +697,8 @@ class CoursePromptItemViewSet(viewsets.ModelViewSet):
         params.update(item.params_override or {})
         tags = list(tpl.tags or [])
         if item.tags_override:
-            seen = set()
-            tags = []
-            for t in (item.tags_override or []):
-                s = str(t).strip().lower()
-                if s and s not in seen:
-                    seen.add(s)
-                    tags.append(s)
-        rendered = content
-        for var in (vars_list or []):
-            val = (request.data or {}).get(var, "{" + var + "}")
-            rendered = rendered.replace("{" + var + "}", str(val))
+            tags = normalize_tags(item.tags_override)
+        rendered = render_template(content, vars_list, request.data or {})
         return Response({
             "id": item.id,
             "title": item.display_title,
@@ -727,23 +733,28 @@ def upload_file(request):
     base_name, file_extension = os.path.splitext(original_filename)
     
     # Sanitize filename (remove/replace problematic characters)
-    safe_base_name = re.sub(r'[^\w\-_\. ]', '_', base_name)
+    safe_base_name = _FILENAME_UNSAFE_RE.sub('_', base_name)
     safe_filename = f"{safe_base_name}{file_extension}"
     
-    # Check for conflicts and add counter if needed
+    # Check for conflicts and add counter if needed; one listdir covers every candidate
+    # instead of an exists() round-trip per collision
+    upload_dir = f"uploads/{upload_path}"
+    try:
+        dirs, files = default_storage.listdir(upload_dir)
+        taken = set(dirs) | set(files)
+    except FileNotFoundError:
+        taken = set()
+    
     counter = 0
     final_filename = safe_filename
-    full_path = f"uploads/{upload_path}/{final_filename}"
-    
-    while default_storage.exists(full_path):
+    while final_filename in taken:
         counter += 1
-        name_with_counter = f"{safe_base_name}_{counter}{file_extension}"
-        final_filename = name_with_counter
-        full_path = f"uploads/{upload_path}/{final_filename}"
+        final_filename = f"{safe_base_name}_{counter}{file_extension}"
+    full_path = f"{upload_dir}/{final_filename}"
     
     try:
-        # Save the file
-        path = default_storage.save(full_path, ContentFile(file.read()))
+        # Save the file; storage copies the upload chunk by chunk instead of reading it into memory
+        path = default_storage.save(full_path, file)
         
         # Generate the URL
         file_url = f"/media/{path}"
@@ -751,7 +762,8 @@ def upload_file(request):
         return Response({
             'success': True,
             'url': file_url,
-            'filename': final_filename,
+            # Storage may still rename on a concurrent upload of the same name
+            'filename': os.path.basename(path),
             'path': path,
             'size': file.size
         })
@@ -777,7 +789,8 @@ def list_course_files(request, course_id):
         
         files_by_location = {}
         
-        # Walk through the directory structure
+        # Walk once, collecting module/lesson directories that hold files
+        located = []
         for root, dirs, files in os.walk(course_path):
             if files:
                 # Get relative path from course directory
@@ -785,43 +798,45 @@ def list_course_files(request, course_id):
                 path_parts = rel_path.split(os.sep) if rel_path != '.' else []
                 
                 # Organize by module/lesson structure
-                if len(path_parts) >= 2:
-                    module_id = path_parts[0]
-                    lesson_id = path_parts[1]
-                    
-                    # Get module and lesson names
-                    try:
-                        module = Module.objects.get(id=module_id)
-                        lesson = Lesson.objects.get(id=lesson_id)
-                        
-                        location_key = f"{module.title} / {lesson.title}"
-                        
-                        if location_key not in files_by_location:
-                            files_by_location[location_key] = {
-                                'module_id': module_id,
-                                'lesson_id': lesson_id,
-                                'module_title': module.title,
-                                'lesson_title': lesson.title,
-                                'files': []
-                            }
-                        
-                        for filename in files:
-                            file_path = os.path.join(root, filename)
-                            file_stat = os.stat(file_path)
-                            
-                            # Generate URL
-                            rel_file_path = os.path.relpath(file_path, settings.MEDIA_ROOT)
-                            file_url = f"/media/{rel_file_path.replace(os.sep, '/')}"
-                            
-                            files_by_location[location_key]['files'].append({
-                                'filename': filename,
-                                'url': file_url,
-                                'size': file_stat.st_size,
-                                'uploaded_at': datetime.fromtimestamp(file_stat.st_mtime).isoformat()
-                            })
-                    except (Module.DoesNotExist, Lesson.DoesNotExist):
-                        # Skip if module or lesson doesn't exist
-                        continue
+                if len(path_parts) >= 2 and path_parts[0].isdigit() and path_parts[1].isdigit():
+                    located.append((path_parts[0], path_parts[1], root, files))
+        
+        # Resolve every module and lesson title with two queries instead of two per directory
+        modules = Module.objects.only('id', 'title').in_bulk({int(m) for m, _, _, _ in located})
+        lessons = Lesson.objects.only('id', 'title').in_bulk({int(l) for _, l, _, _ in located})
+        
+        for module_id, lesson_id, root, files in located:
+            module = modules.get(int(module_id))
+            lesson = lessons.get(int(lesson_id))
+            if module is None or lesson is None:
+                # Skip if module or lesson doesn't exist
+                continue
+            
+            location_key = f"{module.title} / {lesson.title}"
+            
+            if location_key not in files_by_location:
+                files_by_location[location_key] = {
+                    'module_id': module_id,
+                    'lesson_id': lesson_id,
+                    'module_title': module.title,
+                    'lesson_title': lesson.title,
+                    'files': []
+                }
+            
+            for filename in files:
+                file_path = os.path.join(root, filename)
+                file_stat = os.stat(file_path)
+                
+                # Generate URL
+                rel_file_path = os.path.relpath(file_path, settings.MEDIA_ROOT)
+                file_url = f"/media/{rel_file_path.replace(os.sep, '/')}"
+                
+                files_by_location[location_key]['files'].append({
+                    'filename': filename,
+                    'url': file_url,
+                    'size': file_stat.st_size,
+                    'uploaded_at': datetime.fromtimestamp(file_stat.st_mtime).isoformat()
+                })
         
         return Response({'files': files_by_location})
         
@@ -15,16 +15,15 @@ from __future__ import annotations
 
 import argparse
 import os
-import importlib.util
+import queue
 import shutil
 import signal
 import subprocess
 import sys
+import threading
+import time
 from pathlib import Path
-from typing import List, Optional
-import json
-from urllib import request as urlrequest
-from urllib import error as urlerror
+from typing import Iterator, List, Optional
 
 # Paths
 ROOT_DIR: Path = Path(__file__).resolve().parents[1]
@@ -33,92 +32,154 @@ FRONTEND_DIR: Path = ROOT_DIR / "frontend"
 VENV_PY_WIN: Path = ROOT_DIR / ".venv" / "Scripts" / "python.exe"
 VENV_PY_POSIX: Path = ROOT_DIR / ".venv" / "bin" / "python"
 
+# Platform
+IS_WINDOWS: bool = os.name == "nt"
+# CTRL_BREAK_EVENT only reaches a child that leads its own process group. Only children
+# whose parent waits interruptibly get one: a new group stops console Ctrl+C reaching them
+NEW_GROUP_FLAGS: int = subprocess.CREATE_NEW_PROCESS_GROUP if IS_WINDOWS else 0
+# Seconds a child gets to exit after being signalled before it is killed
+STOP_TIMEOUT: float = 5.0
+
 
 def get_python_exe() -> str:
-    if os.name == "nt" and VENV_PY_WIN.exists():
+    if IS_WINDOWS and VENV_PY_WIN.exists():
         return str(VENV_PY_WIN)
     if VENV_PY_POSIX.exists():
         return str(VENV_PY_POSIX)
     return shutil.which("python") or "python"
 
 
-def run(cmd: List[str], cwd: Optional[Path] = None, env: Optional[dict] = None) -> int:
-    merged_env = os.environ.copy()
-    if env:
-        merged_env.update(env)
-    proc = subprocess.Popen(cmd, cwd=str(cwd) if cwd else None, env=merged_env)
-    try:
-        return proc.wait()
-    except KeyboardInterrupt:
+def get_npm_exe() -> str:
+    return shutil.which("npm") or "npm"
+
+
+def _spawn(cmd: List[str], cwd: Optional[Path], env: Optional[dict], creationflags: int = 0) -> subprocess.Popen:
+    # env=None lets the child inherit os.environ without copying it
+    merged_env = {**os.environ, **env} if env else None
+    return subprocess.Popen(cmd, cwd=str(cwd) if cwd else None, env=merged_env, creationflags=creationflags)
+
+
+def _stop(procs: List[subprocess.Popen]) -> None:
+    """Ask each child to exit, then kill any still running after STOP_TIMEOUT seconds."""
+    for p in procs:
         try:
-            if os.name == "nt":
-                proc.send_signal(signal.CTRL_BREAK_EVENT)
+            if IS_WINDOWS:
+                p.send_signal(signal.CTRL_BREAK_EVENT)
             else:
-                proc.terminate()
+                p.terminate()
         except Exception:
             pass
+    deadline = time.monotonic() + STOP_TIMEOUT
+    for p in procs:
+        try:
+            p.wait(timeout=max(deadline - time.monotonic(), 0))
+        except subprocess.TimeoutExpired:
+            p.kill()
+
+
+def run(cmd: List[str], cwd: Optional[Path] = None, env: Optional[dict] = None) -> int:
+    # Same console group: on Windows wait() can't be interrupted, so the child must see Ctrl+C itself
+    proc = _spawn(cmd, cwd, env)
+    try:
+        return proc.wait()
+    except KeyboardInterrupt:
+        _stop([proc])
         return 130
 
 
+def exec_replace(cmd: List[str], cwd: Optional[Path] = None, env: Optional[dict] = None) -> int:
+    """Replace pf with cmd so the command owns the terminal, signals and exit status.
+
+    Windows has no exec that keeps the process, so it falls back to run().
+    """
+    if IS_WINDOWS:
+        return run(cmd, cwd=cwd, env=env)
+    # exec discards Python's buffers; anything printed so far must reach the terminal first
+    sys.stdout.flush()
+    sys.stderr.flush()
+    if cwd:
+        os.chdir(cwd)
+    os.execvpe(cmd[0], cmd, {**os.environ, **env} if env else os.environ)
+
+
+def _wait_and_report(proc: subprocess.Popen, exited: queue.Queue) -> None:
+    proc.wait()
+    exited.put(proc)
+
+
+def _iter_exits(procs: List[subprocess.Popen]) -> Iterator[subprocess.Popen]:
+    """Yield children in the order they exit.
+
+    A waiter thread per child blocks in wait() and reports the exit, so the parent
+    sleeps instead of spinning on poll().
+    """
+    exited: queue.Queue[subprocess.Popen] = queue.Queue()
+    for p in procs:
+        threading.Thread(target=_wait_and_report, args=(p, exited), daemon=True).start()
+    for _ in procs:
+        while True:
+            try:
+                # Timeout only so Ctrl+C is still delivered on Windows
+                proc = exited.get(timeout=0.5)
+                break
+            except queue.Empty:
+                continue
+        yield proc
+
+
 def run_parallel(cmds: List[List[str]], cwds: List[Optional[Path]], envs: List[Optional[dict]]) -> int:
     procs: list[subprocess.Popen] = []
     try:
         for cmd, cwd, env in zip(cmds, cwds, envs):
-            merged_env = os.environ.copy()
-            if env:
-                merged_env.update(env)
-            procs.append(
-                subprocess.Popen(cmd, cwd=str(cwd) if cwd else None, env=merged_env)
-            )
+            procs.append(_spawn(cmd, cwd, env, NEW_GROUP_FLAGS))
+        if not procs:
+            return 0
         # Wait for any to exit; if one exits non-zero, terminate others
+        p = next(_iter_exits(procs))
+        procs.remove(p)
+        _stop(procs)
+        return p.returncode
+    except KeyboardInterrupt:
+        _stop(procs)
+        return 130
+
+
+def run_all(cmds: List[List[str]], cwds: List[Optional[Path]], envs: List[Optional[dict]]) -> int:
+    """Run commands concurrently until every one finishes; return the first failing exit code."""
+    procs: list[subprocess.Popen] = []
+    try:
+        for cmd, cwd, env in zip(cmds, cwds, envs):
+            procs.append(_spawn(cmd, cwd, env, NEW_GROUP_FLAGS))
         exit_code = 0
-        while procs:
-            for p in list(procs):
-                ret = p.poll()
-                if ret is not None:
-                    exit_code = ret
-                    procs.remove(p)
-                    for other in procs:
-                        try:
-                            if os.name == "nt":
-                                other.send_signal(signal.CTRL_BREAK_EVENT)
-                            else:
-                                other.terminate()
-                        except Exception:
-                            pass
-                    return exit_code
+        for p in _iter_exits(procs):
+            exit_code = exit_code or p.returncode
         return exit_code
     except KeyboardInterrupt:
-        for p in procs:
-            try:
-                if os.name == "nt":
-                    p.send_signal(signal.CTRL_BREAK_EVENT)
-                else:
-                    p.terminate()
-            except Exception:
-                pass
+        _stop(procs)
         return 130
 
 
 def daphne_installed() -> bool:
     """Return True if Daphne is importable in the current environment."""
+    import importlib.util
+
     return importlib.util.find_spec("daphne") is not None
 
 
 def cmd_backend(args: argparse.Namespace) -> int:
     py = get_python_exe()
     env = {"DJANGO_DEV": "1"} if args.dev else None
-    return run([py, "manage.py", "runserver"], cwd=BACKEND_DIR, env=env)
+    return exec_replace([py, "manage.py", "runserver"], cwd=BACKEND_DIR, env=env)
 
 
 def cmd_frontend(_: argparse.Namespace) -> int:
-    npm = shutil.which("npm") or "npm"
-    return run([npm, "start"], cwd=FRONTEND_DIR)
+    npm = get_npm_exe()
+    return exec_replace([npm, "start"], cwd=FRONTEND_DIR)
 
 
 def cmd_dev(_: argparse.Namespace) -> int:
     py = get_python_exe()
-    npm = shutil.which("npm") or "npm"
+    npm = get_npm_exe()
     cmds = [[py, "manage.py", "runserver"], [npm, "start"]]
     cwds = [BACKEND_DIR, FRONTEND_DIR]
     envs = [{"DJANGO_DEV": "1"}, None]
@@ -127,30 +188,28 @@ def cmd_dev(_: argparse.Namespace) -> int:
 
 def cmd_migrate(_: argparse.Namespace) -> int:
     py = get_python_exe()
-    return run([py, "manage.py", "migrate"], cwd=BACKEND_DIR)
+    return exec_replace([py, "manage.py", "migrate"], cwd=BACKEND_DIR)
 
 
 def cmd_makemigrations(_: argparse.Namespace) -> int:
     py = get_python_exe()
-    return run([py, "manage.py", "makemigrations"], cwd=BACKEND_DIR)
+    return exec_replace([py, "manage.py", "makemigrations"], cwd=BACKEND_DIR)
 
 
 def cmd_createsuperuser(_: argparse.Namespace) -> int:
     py = get_python_exe()
-    return run([py, "manage.py", "createsuperuser"], cwd=BACKEND_DIR)
+    return exec_replace([py, "manage.py", "createsuperuser"], cwd=BACKEND_DIR)
 
 
 def cmd_install(args: argparse.Namespace) -> int:
-    code = 0
-    if args.target in ("backend", "all"):
-        py = get_python_exe()
-        code = run([py, "-m", "pip", "install", "-r", "requirements.txt"], cwd=BACKEND_DIR)
-        if code:
-            return code
-    if args.target in ("frontend", "all"):
-        npm = shutil.which("npm") or "npm"
-        code = run([npm, "install"], cwd=FRONTEND_DIR)
-    return code
+    pip_cmd = [get_python_exe(), "-m", "pip", "install", "-r", "requirements.txt"]
+    npm_cmd = [get_npm_exe(), "install"]
+    if args.target == "backend":
+        return run(pip_cmd, cwd=BACKEND_DIR)
+    if args.target == "frontend":
+        return run(npm_cmd, cwd=FRONTEND_DIR)
+    # pip and npm installs are independent; run them side by side and wait for both
+    return run_all([pip_cmd, npm_cmd], [BACKEND_DIR, FRONTEND_DIR], [None, None])
 
 
 def cmd_run_daphne(args: argparse.Namespace) -> int:
@@ -177,7 +236,7 @@ def cmd_run_daphne(args: argparse.Namespace) -> int:
         print("[info] --reload is not supported by Daphne; ignoring. Use pf backend for autoreload.")
     cmd.append("config.asgi:application")
 
-    return run(cmd, cwd=BACKEND_DIR)
+    return exec_replace(cmd, cwd=BACKEND_DIR)
 
 
 def cmd_dev_daphne(args: argparse.Namespace) -> int:
@@ -188,7 +247,7 @@ def cmd_dev_daphne(args: argparse.Namespace) -> int:
         return 1
 
     py = get_python_exe()
-    npm = shutil.which("npm") or "npm"
+    npm = get_npm_exe()
 
     daphne_cmd: List[str] = [
         py,
@@ -273,6 +332,12 @@ def main() -> int:
 
 
 def _http_json(method: str, url: str, body: Optional[dict] = None, headers: Optional[dict] = None) -> tuple[int, dict]:
+    # Imported here: urllib.request pulls in http.client/ssl/email, ~20 ms that the
+    # server commands never need
+    import json
+    from urllib import error as urlerror
+    from urllib import request as urlrequest
+
     data = None
     if body is not None:
         data = json.dumps(body).encode("utf-8")
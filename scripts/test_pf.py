@@ -0,0 +1,90 @@
+"""Tests for the pf process helpers. Run with: python -m unittest discover -s scripts"""
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import pf  # noqa: E402
+
+PY = sys.executable
+
+
+def _py(code: str) -> list[str]:
+    return [PY, "-c", code]
+
+
+class SpawnTests(unittest.TestCase):
+    def test_no_overrides_inherit_the_environment(self):
+        with mock.patch.object(pf.subprocess, "Popen") as popen:
+            pf._spawn(["x"], None, None)
+        self.assertIsNone(popen.call_args.kwargs["env"])
+
+    def test_overrides_are_merged_into_the_environment(self):
+        code = "import os, sys; sys.exit(0 if os.environ.get('PF_TEST') == '1' and 'PATH' in os.environ else 1)"
+        self.assertEqual(pf.run(_py(code), env={"PF_TEST": "1"}), 0)
+
+    def test_run_returns_the_child_exit_code(self):
+        self.assertEqual(pf.run(_py("import sys; sys.exit(4)")), 4)
+
+
+@unittest.skipIf(pf.IS_WINDOWS, "POSIX signal handling")
+class StopTests(unittest.TestCase):
+    def test_child_ignoring_terminate_is_killed(self):
+        code = "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); print(flush=True); time.sleep(60)"
+        proc = pf.subprocess.Popen(_py(code), stdout=pf.subprocess.PIPE)
+        proc.stdout.readline()  # handler installed
+        start = time.monotonic()
+        with mock.patch.object(pf, "STOP_TIMEOUT", 0.5):
+            pf._stop([proc])
+        proc.wait(timeout=5)
+        proc.stdout.close()
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(proc.returncode, -pf.signal.SIGKILL)
+
+
+class ParallelTests(unittest.TestCase):
+    def test_run_parallel_returns_first_exit_and_stops_the_rest(self):
+        start = time.monotonic()
+        code = pf.run_parallel([_py("import time; time.sleep(60)"), _py("import sys; sys.exit(3)")], [None, None], [None, None])
+        self.assertEqual(code, 3)
+        self.assertLess(time.monotonic() - start, pf.STOP_TIMEOUT)
+
+    def test_run_parallel_with_no_commands(self):
+        self.assertEqual(pf.run_parallel([], [], []), 0)
+
+    def test_run_all_waits_for_every_child(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        marker = Path(tmp.name) / "done"
+        slow = _py(f"import time, pathlib; time.sleep(0.5); pathlib.Path({str(marker)!r}).write_text('done')")
+        code = pf.run_all([slow, _py("import sys; sys.exit(2)")], [None, None], [None, None])
+        self.assertEqual(code, 2)
+        self.assertTrue(marker.exists())
+
+    def test_run_all_succeeds_when_every_child_does(self):
+        self.assertEqual(pf.run_all([_py("pass"), _py("pass")], [None, None], [None, None]), 0)
+
+
+class ExecReplaceTests(unittest.TestCase):
+    @unittest.skipIf(pf.IS_WINDOWS, "POSIX exec")
+    def test_execs_with_merged_environment(self):
+        with mock.patch.object(pf.os, "execvpe") as execvpe, mock.patch.object(pf.os, "chdir") as chdir:
+            pf.exec_replace(["tool", "arg"], cwd=Path("/srv"), env={"PF_TEST": "1"})
+        chdir.assert_called_once_with(Path("/srv"))
+        name, argv, env = execvpe.call_args.args
+        self.assertEqual((name, argv, env["PF_TEST"]), ("tool", ["tool", "arg"], "1"))
+
+    def test_windows_falls_back_to_run(self):
+        with mock.patch.object(pf, "IS_WINDOWS", True), mock.patch.object(pf, "run", return_value=7) as run:
+            self.assertEqual(pf.exec_replace(["tool"], env={"A": "1"}), 7)
+        run.assert_called_once_with(["tool"], cwd=None, env={"A": "1"})
+
+
+if __name__ == "__main__":
+    unittest.main()